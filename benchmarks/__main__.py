@@ -0,0 +1,328 @@
+"""Run every command of the bot against FakeDiscord at different server sizes
+
+    python -m benchmarks [--sizes 10 1000 10000] [--latency 0.05] [--only "static list"]
+
+Each command runs on a freshly built server with `size` statics and `size` members, where the
+static it runs in has half of the members. Reported are the wall time, the api calls (and how
+many of them hit a rate limit) and the peak memory allocated while the command ran.
+
+Warm cases run once the bot knows the creators of all statics, like it does a while after
+connecting. Reading them takes minutes at the rates the bot keeps to on big servers, so for warm
+cases it may read as fast as it likes. The others run right after connecting.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable
+
+from discord import ApplicationCommand, Bot, Interaction
+
+from discord_static_bot.bot import make_bot
+
+from .fake import FakeDiscord, Limit, World, make_world
+
+STRING, INTEGER = 3, 4
+SUB_COMMAND, CHAT_INPUT, MESSAGE = 1, 1, 3
+# Requests per second while the bot gets ready, see above
+WARM_UP_RATE = 1e9
+
+
+@dataclass
+class Result:
+    size: int
+    command: str
+    seconds: float
+    api_calls: int
+    rate_limited: int
+    peak_kib: float
+    errors: list[str] = field(default_factory=list)
+    calls: dict[str, int] = field(default_factory=dict)
+
+
+class Harness:
+    """The bot from make_bot, attached to a fake server"""
+
+    def __init__(self, world: World):
+        self.world = world
+        self.discord = world.discord
+        self.bot: Bot = make_bot(world.config)
+        self.discord.attach(self.bot)
+        self.errors: list[str] = []
+        self.commands: dict[str, ApplicationCommand] = {}
+
+        for command in self.bot.pending_application_commands:
+            command.id = str(self.discord.snowflake())
+            self.bot._application_commands[command.id] = command
+            self.commands[command.name] = command
+
+        async def record(ctx, exception):
+            self.errors.append(f"{type(exception).__name__}: {exception}")
+
+        self.bot.add_listener(record, "on_application_command_error")
+
+    async def ready(self):
+        """Let the bot get ready and learn the creators of all statics, without counting calls"""
+        before = asyncio.all_tasks()
+        # The bot reports how it started, which doesn't belong in the results
+        with self.discord.unthrottled(), contextlib.redirect_stdout(io.StringIO()):
+            self.bot.dispatch("ready")
+            while pending := [
+                task
+                for task in asyncio.all_tasks() - before
+                if not task.done()
+                and (
+                    task.get_name() == "pycord: on_ready"
+                    or getattr(task.get_coro(), "__qualname__", "").endswith(
+                        "track.<locals>.warm"
+                    )
+                )
+            ]:
+                await asyncio.wait(pending)
+
+    async def slash(
+        self,
+        path: str,
+        channel_id: int,
+        user_id: int,
+        **options: Any,
+    ):
+        """Invoke e.g. "static create" with options like the discord client would"""
+        [name, *sub] = path.split()
+        data_options = [
+            {
+                "name": key,
+                "type": INTEGER if isinstance(value, int) else STRING,
+                "value": value,
+            }
+            for key, value in options.items()
+        ]
+        if sub:
+            data_options = [
+                {"name": sub[0], "type": SUB_COMMAND, "options": data_options}
+            ]
+        await self._invoke(
+            channel_id,
+            user_id,
+            {
+                "id": self.commands[name].id,
+                "name": name,
+                "type": CHAT_INPUT,
+                "options": data_options,
+            },
+        )
+
+    async def message_command(
+        self, name: str, channel_id: int, user_id: int, message_id: int
+    ):
+        message = self.discord.messages[channel_id][message_id]
+        await self._invoke(
+            channel_id,
+            user_id,
+            {
+                "id": self.commands[name].id,
+                "name": name,
+                "type": MESSAGE,
+                "target_id": str(message_id),
+                "resolved": {"messages": {str(message_id): message}},
+            },
+        )
+
+    async def _invoke(self, channel_id: int, user_id: int, data: dict[str, Any]):
+        interaction = Interaction(
+            data=self.discord.interaction(channel_id, user_id, data),  # type: ignore
+            state=self.discord.state,
+        )
+        before = asyncio.all_tasks()
+        await self.bot.process_application_commands(interaction, auto_sync=False)
+        # Error handlers and event listeners run in their own tasks. Others, like the timeouts
+        # of views, aren't part of the command.
+        spawned = {
+            task
+            for task in asyncio.all_tasks() - before
+            if task.get_name().startswith("pycord: ")
+        }
+        if spawned:
+            await asyncio.wait(spawned, timeout=5)
+
+
+@dataclass
+class Case:
+    command: str
+    run: Callable[[Harness], Awaitable[None]]
+    static_members: Callable[[int], int] = lambda size: max(2, size // 2)
+    messages: Callable[[int], int] = lambda size: 2
+    # Run once the bot learned the creators of the statics, see above
+    warm: bool = False
+
+
+def cases() -> list[Case]:
+    def first_static(h: Harness) -> int:
+        return h.world.static_ids[0]
+
+    return [
+        Case(
+            "check_config",
+            lambda h: h.slash("check_config", first_static(h), h.world.admin_id),
+        ),
+        Case(
+            "static create",
+            lambda h: h.slash(
+                "static create",
+                first_static(h),
+                h.world.user_ids[-1],
+                name="benchmark",
+            ),
+        ),
+        Case(
+            "static delete",
+            lambda h: h.slash(
+                "static delete",
+                first_static(h),
+                h.world.admin_id,
+                name=f"s{len(h.world.static_ids) - 1}",
+            ),
+        ),
+        Case(
+            "static list",
+            lambda h: h.slash("static list", first_static(h), h.world.admin_id),
+            warm=True,
+        ),
+        Case(
+            "static list cold",
+            lambda h: h.slash("static list", first_static(h), h.world.admin_id),
+        ),
+        Case(
+            "static clear",
+            lambda h: h.slash(
+                "static clear",
+                first_static(h),
+                h.world.admin_id,
+                limit=len(h.discord.messages[first_static(h)]),
+            ),
+            messages=lambda size: size,
+        ),
+        Case(
+            "member add",
+            lambda h: h.slash(
+                "member add",
+                first_static(h),
+                h.world.user_ids[0],
+                name=f"user{len(h.world.user_ids) - 1}",
+            ),
+        ),
+        Case(
+            "member remove",
+            lambda h: h.slash(
+                "member remove", first_static(h), h.world.user_ids[0], name="user1"
+            ),
+        ),
+        Case(
+            "member list",
+            lambda h: h.slash("member list", first_static(h), h.world.user_ids[0]),
+        ),
+        Case(
+            "mention",
+            lambda h: h.slash("mention", first_static(h), h.world.user_ids[0]),
+        ),
+        Case(
+            "pin",
+            lambda h: h.message_command(
+                "pin",
+                first_static(h),
+                h.world.user_ids[0],
+                max(h.discord.messages[first_static(h)]),
+            ),
+        ),
+    ]
+
+
+async def run_case(case: Case, size: int, discord: FakeDiscord) -> Result:
+    world = make_world(
+        statics=size,
+        members=size,
+        static_members=case.static_members(size),
+        messages=case.messages(size),
+        discord=discord,
+    )
+    if case.warm:
+        world.config = dataclasses.replace(world.config, fanout_rate=WARM_UP_RATE)
+    harness = Harness(world)
+    if case.warm:
+        await harness.ready()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await case.run(harness)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        size=size,
+        command=case.command,
+        seconds=seconds,
+        api_calls=discord.stats.total,
+        rate_limited=sum(discord.stats.rate_limited.values()),
+        peak_kib=peak / 1024,
+        errors=harness.errors,
+        calls=dict(discord.stats.calls),
+    )
+
+
+HEADER = f"{'size':>6}  {'command':<16} {'wall ms':>9} {'api':>6} {'429':>5} {'peak KiB':>9}  errors"
+
+
+def format_row(r: Result) -> str:
+    errors = "; ".join(e.splitlines()[0] for e in r.errors)
+    return (
+        f"{r.size:>6}  {r.command:<16} {r.seconds * 1000:>9.1f} {r.api_calls:>6} "
+        f"{r.rate_limited:>5} {r.peak_kib:>9.0f}  {errors}"
+    )
+
+
+async def main(args: argparse.Namespace):
+    results = []
+    if not args.json:
+        print(HEADER)
+        print("-" * len(HEADER))
+    for size in args.sizes:
+        for case in cases():
+            if args.only and case.command not in args.only:
+                continue
+            discord = FakeDiscord(
+                latency=args.latency,
+                limits=None if args.rate_limits else {"*": Limit(sys.maxsize, 1)},
+            )
+            result = await run_case(case, size, discord)
+            results.append(result)
+            if not args.json:
+                print(format_row(result), flush=True)
+
+    if args.json:
+        json.dump([asdict(r) for r in results], sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per api call"
+    )
+    parser.add_argument(
+        "--no-rate-limits",
+        dest="rate_limits",
+        action="store_false",
+        help="Don't simulate discord's rate limits",
+    )
+    parser.add_argument("--only", nargs="+", help='Commands to run, e.g. "static list"')
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    asyncio.run(main(parser.parse_args()))
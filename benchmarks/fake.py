@@ -0,0 +1,817 @@
+"""In-memory stand-in for the discord api
+
+The bot runs against real pycord models. Only the transport is replaced: FakeHTTP and
+FakeWebhookAdapter answer requests from FakeDiscord, which keeps raw api payloads and feeds the
+resulting gateway events back into the bot's ConnectionState, like discord would.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator
+
+from discord import Bot, ClientUser, Guild, Permissions
+from discord.errors import Forbidden, HTTPException, NotFound
+from discord.http import HTTPClient, Route
+from discord.utils import time_snowflake
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+from discord_static_bot.config import Config
+
+# Messages can't be longer than that
+MAX_CONTENT_LENGTH = 2000
+# Bulk deletes only work on messages younger than that
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+
+TEXT, CATEGORY = 0, 4
+ROLE_OVERWRITE, MEMBER_OVERWRITE = 0, 1
+VIEW_CHANNEL = Permissions(view_channel=True).value
+
+Payload = dict[str, Any]
+
+
+@dataclass
+class FakeResponse:
+    """Enough of an aiohttp response for discord.errors"""
+
+    status: int
+    reason: str
+
+
+def error(status: int, message: str) -> HTTPException:
+    response = FakeResponse(status, message)
+    match status:
+        case 403:
+            return Forbidden(response, message)  # type: ignore
+        case 404:
+            return NotFound(response, message)  # type: ignore
+        case _:
+            return HTTPException(response, message)  # type: ignore
+
+
+@dataclass
+class Limit:
+    """At most `requests` requests every `per` seconds, per route and major parameter"""
+
+    requests: int
+    per: float
+
+
+DEFAULT_LIMITS = {
+    "*": Limit(50, 1),
+    "POST /channels/{channel_id}/messages": Limit(5, 5),
+    "DELETE /channels/{channel_id}/messages/{message_id}": Limit(5, 1),
+    "PATCH /channels/{channel_id}": Limit(10, 10),
+    "PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}": Limit(10, 10),
+    "DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}": Limit(10, 10),
+}
+
+
+@dataclass
+class Stats:
+    calls: Counter[str] = field(default_factory=Counter)
+    rate_limited: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class _Window:
+    """Sliding window of request times for one rate limit bucket"""
+
+    def __init__(self, limit: Limit):
+        self.limit = limit
+        self.times: list[float] = []
+
+    def wait_time(self, now: float) -> float:
+        self.times = [t for t in self.times if now - t < self.limit.per]
+        if len(self.times) < self.limit.requests:
+            return 0
+        return self.times[0] + self.limit.per - now
+
+
+class FakeDiscord:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        limits: dict[str, Limit] | None = None,
+    ):
+        self.latency = latency
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.stats = Stats()
+        self._windows: dict[str, _Window] = {}
+        self._snowflakes: set[int] = set()
+
+        self.guild: Payload = {}
+        self.channels: dict[int, Payload] = {}
+        self.messages: dict[int, dict[int, Payload]] = {}
+        self.members: dict[int, Payload] = {}
+        self.roles: dict[int, Payload] = {}
+        self.users: dict[int, Payload] = {}
+        self.bot_user: Payload = {}
+        self.responses: list[str] = []
+        self.application_id = self.snowflake()
+        self.state: Any = None
+
+        self._routes: dict[tuple[str, str], Callable[..., Any]] = {
+            ("POST", "/guilds/{guild_id}/channels"): self._create_channel,
+            ("PATCH", "/channels/{channel_id}"): self._edit_channel,
+            ("DELETE", "/channels/{channel_id}"): self._delete_channel,
+            (
+                "PUT",
+                "/channels/{channel_id}/permissions/{target_id}",
+            ): self._put_overwrite,
+            (
+                "DELETE",
+                "/channels/{channel_id}/permissions/{target_id}",
+            ): self._delete_overwrite,
+            ("GET", "/channels/{channel_id}/messages"): self._history,
+            ("POST", "/channels/{channel_id}/messages"): self._send,
+            ("GET", "/channels/{channel_id}/messages/{message_id}"): self._get_message,
+            (
+                "DELETE",
+                "/channels/{channel_id}/messages/{message_id}",
+            ): self._delete_message,
+            (
+                "POST",
+                "/channels/{channel_id}/messages/bulk-delete",
+            ): self._bulk_delete,
+            ("PUT", "/channels/{channel_id}/pins/{message_id}"): self._pin,
+            ("DELETE", "/channels/{channel_id}/pins/{message_id}"): self._unpin,
+            ("GET", "/guilds/{guild_id}/members/{member_id}"): self._get_member,
+            (
+                "PUT",
+                "/guilds/{guild_id}/members/{user_id}/roles/{role_id}",
+            ): self._add_role,
+            (
+                "DELETE",
+                "/guilds/{guild_id}/members/{user_id}/roles/{role_id}",
+            ): self._remove_role,
+            ("POST", "/guilds/{guild_id}/roles"): self._create_role,
+            ("DELETE", "/guilds/{guild_id}/roles/{role_id}"): self._delete_role,
+            ("GET", "/users/{user_id}"): self._get_user,
+            (
+                "POST",
+                "/interactions/{webhook_id}/{webhook_token}/callback",
+            ): self._interaction_callback,
+            ("POST", "/webhooks/{webhook_id}/{webhook_token}"): self._followup,
+            (
+                "PATCH",
+                "/webhooks/{webhook_id}/{webhook_token}/messages/{message_id}",
+            ): self._edit_followup,
+            (
+                "GET",
+                "/webhooks/{webhook_id}/{webhook_token}/messages/{message_id}",
+            ): self._get_followup,
+            # Editing the response to the interaction itself
+            (
+                "PATCH",
+                "/webhooks/{webhook_id}/{webhook_token}/messages/@original",
+            ): self._edit_followup,
+            (
+                "DELETE",
+                "/webhooks/{webhook_id}/{webhook_token}/messages/@original",
+            ): self._delete_original,
+        }
+
+    ############
+    # Plumbing #
+    ############
+
+    def snowflake(self, at: datetime | None = None) -> int:
+        # Unique, and sorting by creation time like on discord
+        snowflake = time_snowflake(at or datetime.now(timezone.utc))
+        while snowflake in self._snowflakes:
+            snowflake += 1
+        self._snowflakes.add(snowflake)
+        return snowflake
+
+    def attach(self, bot: Bot):
+        """Route all of the bot's api traffic here and load the guild into its cache"""
+        http = FakeHTTP(self, loop=bot.loop)
+        bot.http = http
+        state = self.state = bot._connection
+        state.http = http
+        state.user = ClientUser(state=state, data=self.bot_user)  # type: ignore[arg-type]
+        state.application_id = self.application_id
+        async_context.set(FakeWebhookAdapter(self))
+        state._add_guild_from_data(self._guild_payload())  # type: ignore[arg-type]
+
+    def guild_object(self) -> Guild:
+        return self.state._get_guild(int(self.guild["id"]))
+
+    @contextmanager
+    def unthrottled(self) -> Iterator[None]:
+        """No rate limits inside, and nothing that happens there shows up in the stats"""
+        limits, self.limits = self.limits, {"*": Limit(sys.maxsize, 1)}
+        try:
+            yield
+        finally:
+            self.limits = limits
+            self._windows.clear()
+            self.stats = Stats()
+
+    async def request(
+        self,
+        method: str,
+        template: str,
+        url: str,
+        payload: Any,
+        params: Payload | None,
+    ) -> Any:
+        key = f"{method} {template}"
+        handler = self._routes.get((method, template))
+        if handler is None:
+            raise NotImplementedError(f"FakeDiscord doesn't know {key}")
+
+        path = url.split("/api/v10", 1)[-1].split("/api/v9", 1)[-1]
+        args = {
+            name[1:-1]: value
+            for name, value in zip(template.split("/"), path.split("/"))
+            if name.startswith("{")
+        }
+        await self._throttle(key, args)
+        self.stats.calls[key] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return handler(payload=payload or {}, params=params or {}, **args)
+
+    async def _throttle(self, key: str, args: dict[str, str]):
+        limit = self.limits.get(key, self.limits["*"])
+        major = [args.get(p) for p in ("channel_id", "guild_id", "webhook_id")]
+        bucket = f"{key} {major}"
+        window = self._windows.setdefault(bucket, _Window(limit))
+        while (wait := window.wait_time(time.monotonic())) > 0:
+            # The library would get a 429 and retry after waiting
+            self.stats.rate_limited[key] += 1
+            await asyncio.sleep(wait)
+        window.times.append(time.monotonic())
+
+    def _dispatch(self, event: str, data: Payload):
+        self.state.parsers[event](data)
+
+    ##############
+    # World data #
+    ##############
+
+    def add_role(self, name: str, permissions: Permissions | None = None) -> int:
+        role_id = self.snowflake()
+        self.roles[role_id] = {
+            "id": str(role_id),
+            "name": name,
+            "color": 0,
+            "hoist": False,
+            "position": len(self.roles),
+            "permissions": str((permissions or Permissions.none()).value),
+            "managed": False,
+            "mentionable": False,
+        }
+        return role_id
+
+    def add_user(self, name: str, bot: bool = False, roles: list[int] = []) -> int:
+        user_id = self.snowflake()
+        self.users[user_id] = user = {
+            "id": str(user_id),
+            "username": name,
+            "discriminator": f"{user_id % 10000:04}",
+            "avatar": None,
+            "bot": bot,
+        }
+        self.members[user_id] = {
+            "user": user,
+            "roles": [str(r) for r in roles],
+            "nick": None,
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+            "deaf": False,
+            "mute": False,
+        }
+        return user_id
+
+    def add_channel(
+        self,
+        name: str,
+        type: int = TEXT,
+        parent_id: int | None = None,
+        overwrites: list[Payload] | None = None,
+    ) -> int:
+        channel_id = self.snowflake()
+        self.channels[channel_id] = {
+            "id": str(channel_id),
+            "type": type,
+            "guild_id": self.guild["id"],
+            "name": name,
+            "position": len(self.channels),
+            "permission_overwrites": overwrites or [],
+            "parent_id": str(parent_id) if parent_id else None,
+            "nsfw": False,
+            "topic": None,
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+        }
+        self.messages[channel_id] = {}
+        return channel_id
+
+    def add_message(
+        self,
+        channel_id: int,
+        content: str,
+        author_id: int | None = None,
+        at: datetime | None = None,
+        pinned: bool = False,
+    ) -> Payload:
+        message_id = self.snowflake(at)
+        author = self.users[author_id] if author_id else self.bot_user
+        mentions = [
+            self.users[int(user_id)]
+            for user_id in re.findall(r"<@!?(\d+)>", content)
+            if int(user_id) in self.users
+        ]
+        message = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": self.guild["id"],
+            "author": author,
+            "content": content,
+            "timestamp": (at or datetime.now(timezone.utc)).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": mentions,
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": pinned,
+            "type": 0,
+        }
+        self.messages[channel_id][message_id] = message
+        channel = self.channels[channel_id]
+        if int(channel["last_message_id"] or 0) < message_id:
+            channel["last_message_id"] = str(message_id)
+        return message
+
+    def _guild_payload(self) -> Payload:
+        return {
+            **self.guild,
+            "roles": list(self.roles.values()),
+            "channels": list(self.channels.values()),
+            "members": list(self.members.values()),
+            "member_count": len(self.members),
+        }
+
+    def _channel(self, channel_id: str | int) -> Payload:
+        try:
+            return self.channels[int(channel_id)]
+        except KeyError:
+            raise error(404, "Unknown Channel")
+
+    def _member(self, user_id: str | int) -> Payload:
+        try:
+            return self.members[int(user_id)]
+        except KeyError:
+            raise error(404, "Unknown Member")
+
+    def _member_event(self, member: Payload) -> Payload:
+        return {**member, "guild_id": self.guild["id"]}
+
+    ############
+    # Channels #
+    ############
+
+    def _create_channel(self, payload: Payload, params: Payload, guild_id: str):
+        channel_id = self.add_channel(
+            payload["name"],
+            payload.get("type", TEXT),
+            int(payload["parent_id"]) if payload.get("parent_id") else None,
+            payload.get("permission_overwrites"),
+        )
+        channel = self.channels[channel_id]
+        self._dispatch("CHANNEL_CREATE", channel)
+        return channel
+
+    def _edit_channel(self, payload: Payload, params: Payload, channel_id: str):
+        channel = self._channel(channel_id)
+        channel.update(
+            {k: v for k, v in payload.items() if k in channel or k == "parent_id"}
+        )
+        self._dispatch("CHANNEL_UPDATE", channel)
+        return channel
+
+    def _delete_channel(self, payload: Payload, params: Payload, channel_id: str):
+        channel = self.channels.pop(int(channel_id), None)
+        if channel is None:
+            raise error(404, "Unknown Channel")
+        self.messages.pop(int(channel_id), None)
+        self._dispatch("CHANNEL_DELETE", channel)
+        return channel
+
+    def _put_overwrite(
+        self, payload: Payload, params: Payload, channel_id: str, target_id: str
+    ):
+        channel = self._channel(channel_id)
+        channel["permission_overwrites"] = [
+            *(o for o in channel["permission_overwrites"] if o["id"] != target_id),
+            {"id": target_id, **payload},
+        ]
+        self._dispatch("CHANNEL_UPDATE", channel)
+
+    def _delete_overwrite(
+        self, payload: Payload, params: Payload, channel_id: str, target_id: str
+    ):
+        channel = self._channel(channel_id)
+        channel["permission_overwrites"] = [
+            o for o in channel["permission_overwrites"] if o["id"] != target_id
+        ]
+        self._dispatch("CHANNEL_UPDATE", channel)
+
+    ############
+    # Messages #
+    ############
+
+    def _history(self, payload: Payload, params: Payload, channel_id: str):
+        self._channel(channel_id)
+        ids = sorted(self.messages[int(channel_id)])
+        limit = int(params.get("limit", 50))
+        if "after" in params:
+            ids = [i for i in ids if i > int(params["after"])][:limit]
+        elif "before" in params:
+            ids = [i for i in ids if i < int(params["before"])][-limit:]
+        else:
+            ids = ids[-limit:]
+        # Newest first, like discord
+        return [self.messages[int(channel_id)][i] for i in reversed(ids)]
+
+    def _send(self, payload: Payload, params: Payload, channel_id: str):
+        self._channel(channel_id)
+        content = payload.get("content") or ""
+        if len(content) > MAX_CONTENT_LENGTH:
+            raise error(400, "Invalid Form Body: content is too long")
+        message = self.add_message(int(channel_id), content, int(self.bot_user["id"]))
+        self._dispatch("MESSAGE_CREATE", message)
+        return message
+
+    def _get_message(
+        self, payload: Payload, params: Payload, channel_id: str, message_id: str
+    ):
+        if (
+            message := self.messages.get(int(channel_id), {}).get(int(message_id))
+        ) is None:
+            raise error(404, "Unknown Message")
+        return message
+
+    def _delete_message(
+        self, payload: Payload, params: Payload, channel_id: str, message_id: str
+    ):
+        if self.messages.get(int(channel_id), {}).pop(int(message_id), None) is None:
+            raise error(404, "Unknown Message")
+        self._dispatch(
+            "MESSAGE_DELETE",
+            {"id": message_id, "channel_id": channel_id, "guild_id": self.guild["id"]},
+        )
+
+    def _bulk_delete(self, payload: Payload, params: Payload, channel_id: str):
+        messages = self.messages.get(int(channel_id), {})
+        ids = [int(i) for i in payload["messages"]]
+        if not 2 <= len(ids) <= 100:
+            raise error(400, "Bulk deletes need between 2 and 100 messages")
+        oldest = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+        if any(i < time_snowflake(oldest) for i in ids):
+            raise error(400, "Bulk deletes only work on messages younger than 14 days")
+        for i in ids:
+            messages.pop(i, None)
+        self._dispatch(
+            "MESSAGE_DELETE_BULK",
+            {
+                "ids": payload["messages"],
+                "channel_id": channel_id,
+                "guild_id": self.guild["id"],
+            },
+        )
+
+    def _pin(self, payload: Payload, params: Payload, channel_id: str, message_id: str):
+        self.messages[int(channel_id)][int(message_id)]["pinned"] = True
+
+    def _unpin(
+        self, payload: Payload, params: Payload, channel_id: str, message_id: str
+    ):
+        self.messages[int(channel_id)][int(message_id)]["pinned"] = False
+
+    ###########
+    # Members #
+    ###########
+
+    def _get_member(
+        self, payload: Payload, params: Payload, guild_id: str, member_id: str
+    ):
+        return self._member(member_id)
+
+    def _get_user(self, payload: Payload, params: Payload, user_id: str):
+        try:
+            return self.users[int(user_id)]
+        except KeyError:
+            raise error(404, "Unknown User")
+
+    def _add_role(
+        self,
+        payload: Payload,
+        params: Payload,
+        guild_id: str,
+        user_id: str,
+        role_id: str,
+    ):
+        member = self._member(user_id)
+        if role_id not in member["roles"]:
+            member["roles"].append(role_id)
+        self._dispatch("GUILD_MEMBER_UPDATE", self._member_event(member))
+
+    def _remove_role(
+        self,
+        payload: Payload,
+        params: Payload,
+        guild_id: str,
+        user_id: str,
+        role_id: str,
+    ):
+        member = self._member(user_id)
+        member["roles"] = [r for r in member["roles"] if r != role_id]
+        self._dispatch("GUILD_MEMBER_UPDATE", self._member_event(member))
+
+    def _create_role(self, payload: Payload, params: Payload, guild_id: str):
+        role_id = self.add_role(
+            payload.get("name", "new role"),
+            Permissions(int(payload.get("permissions", 0))),
+        )
+        role = self.roles[role_id]
+        self._dispatch("GUILD_ROLE_CREATE", {"guild_id": guild_id, "role": role})
+        return role
+
+    def _delete_role(
+        self, payload: Payload, params: Payload, guild_id: str, role_id: str
+    ):
+        if self.roles.pop(int(role_id), None) is None:
+            raise error(404, "Unknown Role")
+        for member in self.members.values():
+            member["roles"] = [r for r in member["roles"] if r != role_id]
+        self._dispatch("GUILD_ROLE_DELETE", {"guild_id": guild_id, "role_id": role_id})
+
+    ################
+    # Interactions #
+    ################
+
+    def interaction(
+        self,
+        channel_id: int,
+        user_id: int,
+        data: Payload,
+        type: int = 2,
+    ) -> Payload:
+        return {
+            "id": str(self.snowflake()),
+            "application_id": str(self.application_id),
+            "type": type,
+            "token": f"token-{self.snowflake()}",
+            "version": 1,
+            "guild_id": self.guild["id"],
+            "channel_id": str(channel_id),
+            "member": {**self.members[user_id], "permissions": "0"},
+            "data": data,
+        }
+
+    def _interaction_callback(
+        self, payload: Payload, params: Payload, webhook_id: str, webhook_token: str
+    ):
+        # Responses aren't stored as messages, they would mess up the history of statics
+        content = (payload.get("data") or {}).get("content") or ""
+        self.responses.append(content)
+        if len(content) > MAX_CONTENT_LENGTH:
+            raise error(400, "Invalid Form Body: content is too long")
+
+    def _followup(
+        self, payload: Payload, params: Payload, webhook_id: str, webhook_token: str
+    ):
+        content = payload.get("content") or ""
+        self.responses.append(content)
+        if len(content) > MAX_CONTENT_LENGTH:
+            raise error(400, "Invalid Form Body: content is too long")
+        return self._webhook_message(content)
+
+    def _edit_followup(
+        self,
+        payload: Payload,
+        params: Payload,
+        webhook_id: str,
+        webhook_token: str,
+        message_id: str = "@original",
+    ):
+        content = payload.get("content") or ""
+        self.responses.append(content)
+        if len(content) > MAX_CONTENT_LENGTH:
+            raise error(400, "Invalid Form Body: content is too long")
+        return self._webhook_message(content)
+
+    def _delete_original(
+        self, payload: Payload, params: Payload, webhook_id: str, webhook_token: str
+    ):
+        return None
+
+    def _get_followup(
+        self,
+        payload: Payload,
+        params: Payload,
+        webhook_id: str,
+        webhook_token: str,
+        message_id: str,
+    ):
+        return self._webhook_message("")
+
+    def _webhook_message(self, content: str) -> Payload:
+        return {
+            "id": str(self.snowflake()),
+            "channel_id": self.guild["id"],
+            "author": self.bot_user,
+            "content": content,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+            "webhook_id": str(self.application_id),
+        }
+
+
+class FakeHTTP(HTTPClient):
+    def __init__(self, discord: FakeDiscord, **kwargs):
+        super().__init__(**kwargs)
+        self.discord = discord
+
+    async def request(self, route: Route, *, files=None, form=None, **kwargs) -> Any:
+        payload = kwargs.get("json")
+        if form:
+            payload = json.loads(next(iter(form))["value"])
+        return await self.discord.request(
+            route.method, route.path, route.url, payload, kwargs.get("params")
+        )
+
+
+class FakeWebhookAdapter(AsyncWebhookAdapter):
+    def __init__(self, discord: FakeDiscord):
+        super().__init__()
+        self.discord = discord
+
+    async def request(
+        self, route: Route, session, *, payload=None, multipart=None, **kwargs
+    ) -> Any:
+        if multipart:
+            payload = json.loads(multipart[0]["value"])
+        return await self.discord.request(
+            route.method, route.path, route.url, payload, kwargs.get("params")
+        )
+
+
+@dataclass
+class World:
+    """A server set up like the README describes, plus ids the benchmarks need"""
+
+    discord: FakeDiscord
+    config: Config
+    admin_id: int
+    user_ids: list[int]
+    static_ids: list[int]
+
+
+def make_world(
+    statics: int,
+    members: int,
+    static_members: int = 2,
+    messages: int = 2,
+    discord: FakeDiscord | None = None,
+) -> World:
+    """A server with that many statics and members
+
+    The first static has `static_members` members and `messages` messages, all others two of
+    each. Statics are spread over overflow categories of 50 channels, like the bot would do.
+    """
+    discord = discord or FakeDiscord()
+    guild_id = discord.snowflake()
+    discord.guild = {
+        "id": str(guild_id),
+        "name": "Fake guild",
+        "owner_id": "0",
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "premium_tier": 0,
+    }
+    # @everyone has the id of the guild
+    discord.roles[guild_id] = {
+        "id": str(guild_id),
+        "name": "@everyone",
+        "color": 0,
+        "hoist": False,
+        "position": 0,
+        "permissions": str(Permissions.general().value),
+        "managed": False,
+        "mentionable": False,
+    }
+    admin_role = discord.add_role("admin")
+    one_channel_role = discord.add_role("one-channel")
+    bots_role = discord.add_role(
+        "bots",
+        Permissions(
+            manage_channels=True,
+            manage_roles=True,
+            manage_messages=True,
+            view_channel=True,
+            read_message_history=True,
+            send_messages=True,
+        ),
+    )
+
+    bot_id = discord.add_user("static-bot", bot=True, roles=[bots_role])
+    discord.bot_user = discord.users[bot_id]
+    admin_id = discord.add_user("admin", roles=[admin_role])
+    user_ids = [discord.add_user(f"user{i}") for i in range(members)]
+
+    category_overwrites = [
+        {
+            "id": str(guild_id),
+            "type": ROLE_OVERWRITE,
+            "allow": "0",
+            "deny": str(VIEW_CHANNEL),
+        },
+        {
+            "id": str(bots_role),
+            "type": ROLE_OVERWRITE,
+            "allow": str(Permissions(view_channel=True, manage_channels=True).value),
+            "deny": "0",
+        },
+    ]
+    base = discord.add_channel("Statics", CATEGORY, overwrites=category_overwrites)
+    categories = [base]
+    static_ids = []
+    for i in range(statics):
+        if i and i % 50 == 0:
+            categories.append(
+                discord.add_channel(
+                    f"Statics ({len(categories) + 1})",
+                    CATEGORY,
+                    overwrites=category_overwrites,
+                )
+            )
+        count = static_members if i == 0 else 2
+        creator, *others = [user_ids[(i + j) % members] for j in range(count)]
+        overwrites = [
+            *category_overwrites,
+            *(
+                {
+                    "id": str(m),
+                    "type": MEMBER_OVERWRITE,
+                    "allow": str(VIEW_CHANNEL),
+                    "deny": "0",
+                }
+                for m in [creator, *others]
+            ),
+        ]
+        channel_id = discord.add_channel(
+            f"static-s{i}", TEXT, categories[-1], overwrites
+        )
+        age = timedelta(days=i % 30, minutes=i)
+        discord.add_message(
+            channel_id,
+            f"Welcome to your new group <@{creator}>",
+            bot_id,
+            at=datetime.now(timezone.utc) - age - timedelta(days=30),
+        )
+        for j in range((messages if i == 0 else 2) - 1, 0, -1):
+            discord.add_message(
+                channel_id,
+                "Hi everyone",
+                creator,
+                at=datetime.now(timezone.utc) - age - timedelta(minutes=j),
+            )
+        static_ids.append(channel_id)
+
+    config = Config(
+        token="fake",
+        guild_id=guild_id,
+        category_id=base,
+        admin_role_id=admin_role,
+        bots_role_id=bots_role,
+        blacklist_role_id=None,
+        whitelist_role_id=None,
+        one_channel_role_id=one_channel_role,
+        overflow_category_ids=categories[1:],
+    )
+    return World(discord, config, admin_id, user_ids, static_ids)
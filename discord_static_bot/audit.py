@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from discord.utils import format_dt, utcnow
+
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+# Commands wait at most that long for room in a full queue, then the entry is dropped
+PUT_TIMEOUT = 0.5
+# Entries kept in memory for /audit
+RECENT = 10_000
+
+
+@dataclass
+class Entry:
+    guild_id: int
+    actor_id: int
+    action: str
+    channel_id: int | None = None
+    member_ids: list[int] = field(default_factory=list)
+    details: dict = field(default_factory=dict)
+    time: datetime = field(default_factory=utcnow)
+
+    def keys(self) -> Iterable[tuple[str, int]]:
+        """What the entry can be looked up by"""
+        yield "user", self.actor_id
+        for member_id in self.member_ids:
+            if member_id != self.actor_id:
+                yield "user", member_id
+        if self.channel_id is not None:
+            yield "channel", self.channel_id
+
+    def __str__(self) -> str:
+        """A line for discord, mentions in ephemeral messages don't notify anybody"""
+        details = dict(self.details)
+        parts = [format_dt(self.time, "f"), f"<@{self.actor_id}>", self.action]
+        if self.member_ids:
+            parts.append(", ".join(f"<@{member_id}>" for member_id in self.member_ids))
+        if channel := details.pop("channel", None):
+            parts.append(f"in {channel}")
+        if details:
+            parts.append(f"({', '.join(f'{k}: {v}' for k, v in details.items())})")
+        return " ".join(parts)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "time": self.time.isoformat(),
+                "guild_id": self.guild_id,
+                "actor_id": self.actor_id,
+                "action": self.action,
+                "channel_id": self.channel_id,
+                "member_ids": self.member_ids,
+                **self.details,
+            }
+        )
+
+
+class AuditLog:
+    """Who did what with statics, in a JSON lines file that is rotated when it gets big
+
+    Commands only put entries on a queue, a background task writes them in batches from a
+    thread. Recent entries stay in memory, indexed by user and channel.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._queue: asyncio.Queue[Entry] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._recent: deque[Entry] = deque()
+        self._index: dict[tuple[str, int], deque[Entry]] = {}
+        self.dropped = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._write_regularly())
+
+    async def record(self, entry: Entry):
+        self._remember(entry)
+        try:
+            await asyncio.wait_for(self._queue.put(entry), PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            # The disk can't keep up, losing entries is better than holding up commands
+            self.dropped += 1
+            print(f"Audit log is behind, dropped: {entry.to_json()}", file=sys.stderr)
+
+    #########
+    # Index #
+    #########
+
+    def _remember(self, entry: Entry):
+        if len(self._recent) == RECENT:
+            old = self._recent.popleft()
+            # Entries are added in order everywhere, so the oldest is first in its keys too
+            for key in old.keys():
+                entries = self._index[key]
+                entries.popleft()
+                if not entries:
+                    del self._index[key]
+        self._recent.append(entry)
+        for key in entry.keys():
+            self._index.setdefault(key, deque()).append(entry)
+
+    def recent(
+        self,
+        guild_id: int,
+        user_id: int | None = None,
+        channel_id: int | None = None,
+        limit: int = 20,
+    ) -> list[Entry]:
+        """The latest entries of the guild, newest first, optionally about a user or channel"""
+        keys = [
+            (kind, id)
+            for kind, id in (("user", user_id), ("channel", channel_id))
+            if id is not None
+        ]
+        candidates = [self._index.get(key, ()) for key in keys]
+        # Start from the shortest list and check the other conditions on each entry
+        entries = min(candidates, key=len) if candidates else self._recent
+        found = []
+        for entry in reversed(entries):
+            if len(found) == limit:
+                break
+            if entry.guild_id != guild_id:
+                continue
+            if user_id is not None and ("user", user_id) not in entry.keys():
+                continue
+            if channel_id is not None and entry.channel_id != channel_id:
+                continue
+            found.append(entry)
+        return found
+
+    ###########
+    # Writing #
+    ###########
+
+    async def _write_regularly(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(
+                    self._write, "".join(entry.to_json() + "\n" for entry in batch)
+                )
+            except OSError as e:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+
+    def _write(self, lines: str):
+        if self._path.exists() and self._path.stat().st_size >= self._max_bytes:
+            self._rotate()
+        with self._path.open("a") as f:
+            f.write(lines)
+
+    def _rotate(self):
+        """log -> log.1 -> log.2 ..., dropping the oldest"""
+        backup = lambda n: self._path.with_name(f"{self._path.name}.{n}")
+        for n in range(self._backups - 1, 0, -1):
+            if backup(n).exists():
+                backup(n).replace(backup(n + 1))
+        if self._backups > 0:
+            self._path.replace(backup(1))
+        else:
+            self._path.unlink()
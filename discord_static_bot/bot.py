@@ -2,32 +2,88 @@ from __future__ import annotations
 import dataclasses
 
 import re
-from asyncio import gather
+import signal
+import asyncio
+from asyncio import Lock, Task, gather
+from collections import Counter
 import sys
 import traceback
-from typing import TYPE_CHECKING, Iterable, Literal
-from discord.errors import Forbidden, NotFound
+from datetime import date, datetime, time, timedelta, timezone
+from time import monotonic
+from math import ceil
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Literal,
+    TypeGuard,
+)
+from discord.errors import NotFound
 
+import io
 import discord.utils
+from discord.utils import snowflake_time
 from discord import (
+    AllowedMentions,
     ApplicationCommandError,
     ApplicationContext,
+    Attachment,
+    AutocompleteContext,
+    AutoShardedBot,
     Bot,
     CategoryChannel,
     CheckFailure,
+    File,
     Guild,
+    Intents,
     Member,
     Message,
     Option,
+    OptionChoice,
+    PermissionOverwrite,
+    RawBulkMessageDeleteEvent,
+    RawMessageDeleteEvent,
+    RawMessageUpdateEvent,
+    Role,
     TextChannel,
     User,
     guild_only,
 )
 
 if TYPE_CHECKING:
+    from discord.abc import GuildChannel
     from discord.interactions import InteractionChannel
 
-from .config import Config
+from .audit import AuditLog, Entry
+from .config import STARTUP_ONLY, Config, GuildConfig
+from .deadline import DeadlineContext, auto_defer, public_response
+from .fanout import FanOut
+from .flight import SingleFlight
+from .pages import MAX_MESSAGE_LENGTH, PageView, Paginator, paginate, truncate
+from .purge import Progress, purge
+from .index import (
+    CATEGORY_LIMIT,
+    CreatorIndex,
+    StaticIndex,
+    overflow_name,
+)
+from . import manifest
+from .ledger import Ledger
+from .members import MemberIndex, member_keys, member_tag
+from .metrics import Metrics, resident_memory
+from .sweep import Sweeper, is_warning
+from .throttle import Throttle
+from .writes import (
+    ChannelDelete,
+    OverwriteEdit,
+    RoleDelete,
+    RoleEdit,
+    Write,
+    WriteScheduler,
+)
 
 # Open questions
 # --------------
@@ -37,8 +93,6 @@ from .config import Config
 # Future work
 # -----------
 # - Remove the hack below once https://github.com/Pycord-Development/pycord/issues/1649 is fixed
-# - Autocomplete once https://github.com/Pycord-Development/pycord/issues/1630 is released
-# - Audit log
 # - Restrict all calls to server users (if we need that?)
 
 
@@ -54,6 +108,21 @@ discord.utils._MissingSentinel.cog_after_invoke = lambda *args, **kwargs: None
 discord.utils._MissingSentinel.cog_command_error = lambda *args, **kwargs: None  # type: ignore
 
 
+# Discord doesn't show more suggestions than that
+AUTOCOMPLETE_LIMIT = 25
+# Discord rejects all suggestions if one has a longer value
+CHOICE_VALUE_LIMIT = 100
+# Suggestions are due within 3 seconds. Shorter prefixes match too many members to be worth a
+# query, which shares the gateway's rate limit with the heartbeat.
+AUTOCOMPLETE_QUERY_TIMEOUT = 1.0
+AUTOCOMPLETE_QUERY_MIN_LENGTH = 2
+# Discord doesn't return more members for a single query
+QUERY_LIMIT = 100
+# Seconds between looking for changes to the config file
+CONFIG_POLL_INTERVAL = 5.0
+# Seconds between updates of the progress of an import
+PROGRESS_INTERVAL = 2.0
+
 static_name_re = re.compile("[a-z][a-z0-9-]*")
 static_name_re_description = "It must only contain lowercase letters, numbers and the character '-' and start with a letter."
 
@@ -70,18 +139,101 @@ def clean_static_name(name: str) -> str:
     return f"static-{name}"
 
 
-def make_bot(config: Config) -> Bot:
-    bot = Bot()
+def parse_day(day: str) -> datetime:
+    try:
+        return datetime.combine(date.fromisoformat(day), time(), tzinfo=timezone.utc)
+    except ValueError:
+        raise CheckFailure(f"Cannot read {day}, please write dates like 2022-09-30")
+
+
+def split_names(names: str) -> list[str]:
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+def make_bot(
+    config: Config,
+    load_config: Callable[[], Config] | None = None,
+    watch: Path | None = None,
+) -> Bot:
+    """The bot, `load_config` loads the config again for reloads, `watch` is its file"""
+    started = monotonic()
+    if config.lean:
+        # Guilds for channels and roles, members to keep the member index current, guild
+        # messages for the last message of statics, the ledger and the creator cache
+        intents = Intents.none()
+        intents.guilds = True
+        intents.members = True
+        intents.guild_messages = True
+        # Members are fetched when commands need them instead of all of them on startup, and
+        # messages are never looked up in the cache
+        options = dict(max_messages=None, chunk_guilds_at_startup=False)
+    else:
+        # Member lookups need the member cache, see "SERVER MEMBERS INTENT" in the README
+        intents = Intents.default()
+        intents.members = True
+        options = {}
+    # Caches are shared by all shards, just the gateway connections are split
+    bot: Bot = (AutoShardedBot if config.sharded else Bot)(  # type: ignore
+        intents=intents, **options
+    )
+    index = StaticIndex()
+    fanout = FanOut(config.fanout_concurrency, config.fanout_rate)
+    # Reads that several commands might need at the same time
+    reads = SingleFlight(config.read_cache_ttl)
+    creators = CreatorIndex(fanout, reads)
+    members = MemberIndex()
+    # Static members by channel id, see channel_members
+    static_members: dict[int, list[Member]] = {}
+    ledger = Ledger(config.ledger_path) if config.ledger_path else None
+    # Ids of the overflow categories the bot created by base category id, see category_pool
+    overflows: dict[int, list[int]] = ledger.overflows() if ledger is not None else {}
+    audit = (
+        AuditLog(
+            config.audit_log_path,
+            config.audit_log_max_bytes,
+            config.audit_log_backups,
+        )
+        if config.audit_log_path
+        else None
+    )
+    # Keep references to background tasks so they don't get garbage collected
+    background: set[Task] = set()
+    # (guild id, name) of statics that are being created right now but might not be indexed yet
+    creating: set[tuple[int, str]] = set()
+    # Statics that are being created, by category id
+    placing: Counter[int] = Counter()
+    # Only one create should add an overflow category when all categories are full
+    overflow_lock = Lock()
+    throttle = Throttle()
+    # /check_config reports by guild id, dropped whenever something they depend on changes
+    reports: dict[int, str] = {}
+    metrics = Metrics() if config.metrics else None
+    if metrics is not None:
+        metrics.instrument(bot)
+        metrics.reads = reads
+    auto_defer(bot, config.defer_after)
+    # All changes to channels and roles go through here
+    writes = WriteScheduler(
+        config.write_concurrency,
+        on_depth=metrics.set_write_queue_depth if metrics is not None else None,
+    )
+
+    async def respond_privately(ctx: ApplicationContext, content: str):
+        # Errors of commands that were deferred publicly would be shown to everyone otherwise
+        if isinstance(ctx, DeadlineContext):
+            await ctx.respond_privately(content)
+        else:
+            await ctx.respond(content, ephemeral=True)
 
     @bot.event
     async def on_application_command_error(ctx: ApplicationContext, exception):
         match exception:
             case CheckFailure(args=[message]):
-                await ctx.respond(f"Sorry: {message}", ephemeral=True)
+                await respond_privately(ctx, f"Sorry: {message}")
             case ApplicationCommandError(original=original):
                 match original:
                     case UserVisibleError(args=[message]):
-                        await ctx.respond(f"Error: {message}", ephemeral=True)
+                        await respond_privately(ctx, f"Error: {message}")
                     case NotImplementedError():
                         await ctx.respond(
                             f"Sorry, that feature isn't implemented yet. We're working on it!"
@@ -105,14 +257,359 @@ def make_bot(config: Config) -> Bot:
                     type(exception), exception, exception.__traceback__, file=sys.stderr
                 )
 
+    ##########
+    # Events #
+    ##########
+
+    @bot.listen()
+    async def on_ready():
+        nonlocal started
+        if started is not None:
+            startup, started = monotonic() - started, None
+            rss = resident_memory()
+            print(
+                f"Ready after {startup:.1f}s"
+                + (f", {rss / 2**20:.0f} MiB resident" if rss is not None else "")
+            )
+            if metrics is not None:
+                metrics.startup_seconds = startup
+
+            try:
+                bot.loop.add_signal_handler(signal.SIGHUP, report_reload, "Got SIGHUP")
+            except (AttributeError, NotImplementedError):
+                # No SIGHUP on windows
+                pass
+            if watch is not None:
+                task = bot.loop.create_task(watch_config(watch))
+                background.add(task)
+                task.add_done_callback(background.discard)
+
+        for guild in bot.guilds:
+            index.rebuild(guild)
+            members.rebuild(guild)
+
+        track(config.by_guild)
+        reports.clear()
+        verify_all()
+        if ledger is not None:
+            ledger.start()
+        if audit is not None:
+            audit.start()
+
+        if sweeper is not None:
+            sweeper.start()
+
+        if metrics is not None:
+            await metrics.start(config.metrics_port, config.metrics_host)
+
+    @bot.listen()
+    async def on_guild_join(guild: Guild):
+        index.rebuild(guild)
+        members.rebuild(guild)
+
+    @bot.listen()
+    async def on_guild_remove(guild: Guild):
+        index.drop(guild)
+        members.drop(guild)
+
+    @bot.listen()
+    async def on_member_join(member: Member):
+        members.add(member)
+        # Overwrites of members that weren't cached resolve now
+        static_members.clear()
+
+    @bot.listen()
+    async def on_member_remove(member: Member):
+        members.remove(member)
+        static_members.clear()
+
+    @bot.listen()
+    async def on_member_update(before: Member, after: Member):
+        members.add(after)
+        if after == after.guild.me:
+            reports.pop(after.guild.id, None)
+
+    @bot.listen()
+    async def on_guild_role_create(role: Role):
+        reports.pop(role.guild.id, None)
+
+    @bot.listen()
+    async def on_guild_role_delete(role: Role):
+        reports.pop(role.guild.id, None)
+
+    @bot.listen()
+    async def on_guild_role_update(before: Role, after: Role):
+        reports.pop(after.guild.id, None)
+
+    @bot.listen()
+    async def on_user_update(before: User, after: User):
+        members.refresh(after.id, bot.guilds)
+
+    @bot.listen()
+    async def on_guild_channel_create(channel: GuildChannel):
+        index.add(channel)
+        reports.pop(channel.guild.id, None)
+        if ledger is not None and is_static(channel):
+            ledger.static(channel)
+
+    @bot.listen()
+    async def on_guild_channel_delete(channel: GuildChannel):
+        index.remove(channel)
+        reports.pop(channel.guild.id, None)
+        creators.forget(channel.id)
+        static_members.pop(channel.id, None)
+        if ledger is not None:
+            ledger.remove(channel.id)
+
+    @bot.listen()
+    async def on_guild_channel_update(before: GuildChannel, after: GuildChannel):
+        index.update(before, after)
+        reports.pop(after.guild.id, None)
+        static_members.pop(after.id, None)
+        if ledger is not None:
+            if is_static(after):
+                ledger.static(after)
+            else:
+                ledger.remove(after.id)
+
+    if ledger is not None:
+
+        @bot.listen()
+        async def on_message(message: Message):
+            ledger.message(message)
+
+    @bot.listen()
+    async def on_raw_message_edit(payload: RawMessageUpdateEvent):
+        creators.invalidate(payload.channel_id, payload.message_id)
+
+    @bot.listen()
+    async def on_raw_message_delete(payload: RawMessageDeleteEvent):
+        creators.invalidate(payload.channel_id, payload.message_id)
+
+    @bot.listen()
+    async def on_raw_bulk_message_delete(payload: RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            creators.invalidate(payload.channel_id, message_id)
+
+    def track(guild_ids: Iterable[int]):
+        """Bring the ledger and the creators of statics up to date for the servers"""
+        statics = []
+        for guild_id in guild_ids:
+            ours = config.guild(guild_id)
+            if ours is None:
+                # The server was taken out of the config, its statics aren't ours anymore
+                if ledger is not None:
+                    ledger.sync(guild_id, [])
+            elif (guild := bot.get_guild(guild_id)) is not None:
+                found = statics_in(category_pool(guild, ours))
+                if ledger is not None:
+                    ledger.sync(guild.id, found)
+                statics += found
+
+        async def warm():
+            await creators.warm(statics)
+            if ledger is not None:
+                for static in statics:
+                    ledger.creator(static, creators.known(static.id))
+
+        task = bot.loop.create_task(warm())
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+    ##################
+    # Config reloads #
+    ##################
+
+    def swap_config() -> list[str]:
+        """Load the config again and use it from now on, if it looks good"""
+        nonlocal config
+        if load_config is None:
+            raise CheckFailure(
+                "The config comes from the environment, restart the bot to change it"
+            )
+        try:
+            new = load_config()
+        except (OSError, ValueError, TypeError) as e:
+            raise CheckFailure(f"Couldn't load the config: {e}")
+        if problems := new.problems():
+            raise CheckFailure(
+                "\n".join(
+                    ["Keeping the old config, the new one has problems:", *problems]
+                )
+            )
+
+        restart = [
+            name.upper()
+            for name in STARTUP_ONLY
+            if getattr(new, name) != getattr(config, name)
+        ]
+        new = dataclasses.replace(
+            new, **{name: getattr(config, name) for name in STARTUP_ONLY}
+        )
+        changed = [
+            guild_id
+            for guild_id in {*new.by_guild, *config.by_guild}
+            if config.guild(guild_id) != new.guild(guild_id)
+        ]
+        # Everything looks the config up when it runs, so from here on the new one is used
+        config = new
+        track(changed)
+        reports.clear()
+        return [
+            "Reloaded the config",
+            *([f"These need a restart: {', '.join(restart)}"] if restart else []),
+        ]
+
+    def report_reload(why: str):
+        try:
+            lines = swap_config()
+        except CheckFailure as e:
+            print(f"{why}, but: {e}", file=sys.stderr)
+        else:
+            print(f"{why}: " + "\n".join(lines))
+
+    async def watch_config(path: Path):
+        def modified() -> float | None:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return None
+
+        last = modified()
+        while True:
+            await asyncio.sleep(CONFIG_POLL_INTERVAL)
+            # Editors often replace the file, it might be missing for a moment
+            if (current := modified()) is not None and current != last:
+                last = current
+                report_reload(f"{path} changed")
+
+    ################
+    # Verification #
+    ################
+
+    def verify(guild: Guild) -> str:
+        """Check the settings of the server, only looking at the cache"""
+        good, bad, unkn = ":white_check_mark:", ":exclamation:", ":grey_question:"
+        checked = {"token"}  # We wouldn't be here if that doesn't work
+
+        lines: list[str] = []
+        mk_line = lambda icon, key, msg: " ".join(
+            [icon, *([key] if key else []), *([f": {msg}"] if msg else [])]
+        )
+        add_line = lambda *a: lines.append(mk_line(*a))
+
+        me = guild.me
+        ours = config.guild(guild.id)
+        if not config.by_guild:
+            add_line(bad, "GUILD_ID", "Missing")
+        elif ours is None:
+            add_line(unkn, "GUILD_ID", "Configured, but not for this server")
+        else:
+            checked.add("guild_id")
+            if not ours.category_id:
+                add_line(bad, "CATEGORY_ID", "Not configured")
+            elif (category := index[guild].category(ours.category_id)) is None:
+                add_line(bad, "CATEGORY_ID", "Static category not found")
+            else:
+                for perm in ["view_channel", "manage_channels"]:
+                    if not getattr(category.permissions_for(me), perm):
+                        add_line(
+                            bad,
+                            "CATEGORY_ID",
+                            f'Bot needs "{perm}" permissions on the category',
+                        )
+            checked.add("category_id")
+
+            for key in ["ADMIN_ROLE_ID", "BOTS_ROLE_ID"]:
+                id = getattr(ours, key.lower())
+                if not id:
+                    add_line(bad, key, "Not configured")
+                elif not guild.get_role(id):
+                    add_line(bad, key, "Role not found")
+                checked.add(key.lower())
+
+            for key in [
+                "BLACKLIST_ROLE_ID",
+                "WHITELIST_ROLE_ID",
+                "ONE_CHANNEL_ROLE_ID",
+            ]:
+                id = getattr(ours, key.lower())
+                if id and not guild.get_role(id):
+                    add_line(bad, key, "Role not found")
+                checked.add(key.lower())
+
+            # Discord only lets the bot manage roles below its own highest role
+            one_channel_role = get_one_channel_role(guild)
+            if one_channel_role and (
+                one_channel_role >= me.top_role or one_channel_role.managed
+            ):
+                add_line(
+                    bad,
+                    "ONE_CHANNEL_ROLE_ID",
+                    "Bot role must be above the one-channel-role for the bot to manage it",
+                )
+
+            if ours.archive_category_id:
+                archive = guild.get_channel(ours.archive_category_id)
+                if not isinstance(archive, CategoryChannel):
+                    add_line(bad, "ARCHIVE_CATEGORY_ID", "Category not found")
+                elif not archive.permissions_for(me).manage_channels:
+                    add_line(
+                        bad,
+                        "ARCHIVE_CATEGORY_ID",
+                        'Bot needs "manage_channels" permissions on the category',
+                    )
+            checked.add("archive_category_id")
+
+            for category_id in ours.overflow_category_ids:
+                if not isinstance(guild.get_channel(category_id), CategoryChannel):
+                    add_line(
+                        bad,
+                        "OVERFLOW_CATEGORY_IDS",
+                        f"Category {category_id} not found",
+                    )
+            if ledger is None:
+                # Only kept in memory, they are forgotten on restart
+                for category_id in overflows.get(ours.category_id, []):
+                    if category_id not in ours.overflow_category_ids:
+                        add_line(
+                            unkn,
+                            "OVERFLOW_CATEGORY_IDS",
+                            f"Add {category_id}, the bot created it as an overflow category",
+                        )
+            checked.add("overflow_category_ids")
+
+            for perm in ["manage_channels", "manage_roles", "manage_messages"]:
+                if not getattr(me.guild_permissions, perm):
+                    add_line(bad, None, f'Bot needs "{perm}" permission')
+
+        # Settings that aren't per server have defaults that always work
+        unchecked = {f.name for f in dataclasses.fields(GuildConfig)} - checked
+
+        return "\n".join(
+            [
+                "Checking bot config:",
+                *(lines if lines else [":smiling_face_with_3_hearts: All good"]),
+                *([f"\nUnchecked values: {', '.join(unchecked)}"] if unchecked else []),
+            ]
+        )
+
+    def verify_all():
+        for guild_id in config.by_guild:
+            if (guild := bot.get_guild(guild_id)) is None:
+                print(f"Not on server {guild_id}, is the bot invited?", file=sys.stderr)
+                continue
+            report = reports[guild_id] = verify(guild)
+            print(f"{guild.name}: {report}")
+
     ##########
     # Checks #
     ##########
 
     def admin(ctx: ApplicationContext) -> Literal[True]:
         match ctx.author:
-            case Member(roles=roles):
-                if any(role.id == config.admin_role_id for role in roles):
+            case Member() as author:
+                if is_admin(author):
                     return True
                 else:
                     raise CheckFailure("That command is for admins only.")
@@ -125,7 +622,12 @@ def make_bot(config: Config) -> Bot:
         match ctx.channel:
             case None:
                 raise UserVisibleError("Not sent through a channel?!?")
-            case object(category_id=config.category_id):
+            case object(category_id=int(category_id)) if ctx.guild and (
+                ours := config.guild(ctx.guild.id)
+            ) and any(
+                category.id == category_id
+                for category in category_pool(ctx.guild, ours)
+            ):
                 return True
             case _:
                 raise CheckFailure("Only allowed in the private-statics category")
@@ -136,17 +638,20 @@ def make_bot(config: Config) -> Bot:
 
     def our_guild(ctx: ApplicationContext) -> Guild:
         match ctx.guild:
-            case Guild(id=config.guild_id):
+            case Guild(id=guild_id) if config.guild(guild_id) is not None:
                 return ctx.guild
             case _:
                 raise CheckFailure("These commands are only allowed on the server")
 
+    def settings(guild: Guild) -> GuildConfig:
+        """Settings of a server that the bot is set up for"""
+        if (found := config.guild(guild.id)) is None:
+            raise CheckFailure("The bot isn't set up for this server")
+        return found
+
     def our_category(ctx: ApplicationContext, guild: Guild) -> CategoryChannel:
-        try:
-            [category] = [
-                c for c in our_guild(ctx).categories if c.id == config.category_id
-            ]
-        except ValueError:
+        category = index[our_guild(ctx)].category(settings(guild).category_id)
+        if category is None:
             raise UserVisibleError("Couldn't find the category for statics")
 
         if not category.permissions_for(guild.me).view_channel:
@@ -155,21 +660,269 @@ def make_bot(config: Config) -> Bot:
             )
         return category
 
+    def our_categories(ctx: ApplicationContext, guild: Guild) -> list[CategoryChannel]:
+        """The statics category and its overflow categories"""
+        # Fails if the bot can't use the statics category
+        our_category(ctx, guild)
+        return category_pool(guild, settings(guild))
+
+    def category_pool(guild: Guild, ours: GuildConfig) -> list[CategoryChannel]:
+        """The statics category followed by the configured and the created overflow categories"""
+        return index[guild].pool(
+            ours.category_id,
+            [*ours.overflow_category_ids, *overflows.get(ours.category_id, [])],
+        )
+
+    def is_static(channel: GuildChannel) -> TypeGuard[TextChannel]:
+        return (
+            isinstance(channel, TextChannel)
+            and (ours := config.guild(channel.guild.id)) is not None
+            and channel.name.startswith("static-")
+            and any(
+                category.id == channel.category_id
+                for category in category_pool(channel.guild, ours)
+            )
+        )
+
+    def statics_in(categories: list[CategoryChannel]) -> list[TextChannel]:
+        return [
+            static
+            for category in categories
+            for static in index[category.guild].statics(category.id)
+        ]
+
+    async def category_with_room(
+        guild: Guild, base: CategoryChannel
+    ) -> CategoryChannel:
+        """The least full category of the pool, adding an overflow category if all are full"""
+        async with overflow_lock:
+            pool = category_pool(guild, settings(guild))
+            used = (
+                lambda category: index[guild].sizes[category.id] + placing[category.id]
+            )
+            category = min(pool, key=used)
+            if used(category) < CATEGORY_LIMIT:
+                return category
+
+            category = await guild.create_category(
+                overflow_name(base, len(pool) + 1),
+                overwrites=base.overwrites,
+                reason="All categories for statics are full",
+            )
+            index.add(category)
+            overflows.setdefault(base.id, []).append(category.id)
+            if ledger is not None:
+                await ledger.overflow(category.id, base.id)
+            else:
+                print(
+                    f"Created overflow category {category.id}, add it to OVERFLOW_CATEGORY_IDS"
+                    " to keep using it after a restart",
+                    file=sys.stderr,
+                )
+            return category
+
     def get_guild_member(guild: Guild, name: str) -> Member:
-        member = guild.get_member_named(name)
-        if member is None:
-            raise CheckFailure("That member doesn't exist. Are they on the server?")
-        if any(r.id == config.bots_role_id for r in member.roles):
+        match members[guild].named(name):
+            case []:
+                raise CheckFailure("That member doesn't exist. Are they on the server?")
+            case [member]:
+                pass
+            case candidates:
+                # Tags are unique, other names might be shared
+                try:
+                    [member] = [
+                        m for m in candidates if member_tag(m).lower() == name.lower()
+                    ]
+                except ValueError:
+                    raise CheckFailure(
+                        "Several members go by that name, please pick one from the suggestions"
+                    )
+        if member.get_role(settings(guild).bots_role_id):
             raise CheckFailure("Not operating on bots")
         return member
 
-    def channel_members(channel: TextChannel) -> Iterable[Member]:
+    def member_choices(
+        ctx: AutocompleteContext, candidates: Iterable[Member]
+    ) -> list[OptionChoice]:
+        # Only the last of the comma separated names is being completed
+        done, _, _ = (ctx.value or "").rpartition(",")
+        names = [*split_names(done)]
+        choices = []
+        for m in candidates:
+            if m.bot or member_tag(m) in names:
+                continue
+            value = ", ".join([*names, member_tag(m)])
+            # Too many names for one option, the rest have to go in another command
+            if len(value) > CHOICE_VALUE_LIMIT:
+                continue
+            choices.append(
+                OptionChoice(name=f"{m.display_name} ({member_tag(m)})", value=value)
+            )
+            if len(choices) == AUTOCOMPLETE_LIMIT:
+                break
+        return choices
+
+    def current_name(ctx: AutocompleteContext) -> str:
+        return (ctx.value or "").rpartition(",")[2].strip()
+
+    async def guild_member_autocomplete(ctx: AutocompleteContext) -> list[OptionChoice]:
+        match ctx.interaction.guild:
+            case Guild(id=guild_id) as guild if config.guild(guild_id):
+                # Ask for some more to leave room for bots that get filtered out
+                prefix = current_name(ctx)
+                found = members[guild].search(prefix, AUTOCOMPLETE_LIMIT * 2)
+                if (
+                    config.lean
+                    and len(prefix) >= AUTOCOMPLETE_QUERY_MIN_LENGTH
+                    and len(found) < AUTOCOMPLETE_LIMIT
+                ):
+
+                    async def query() -> list[Member]:
+                        return await guild.query_members(
+                            prefix, limit=AUTOCOMPLETE_LIMIT * 2
+                        )
+
+                    # Keystrokes with the same prefix share one query, which keeps running
+                    # for the next keystroke when this one gives up
+                    try:
+                        queried = await asyncio.wait_for(
+                            reads.do(
+                                ("query_members", guild.id, prefix.lower()), query
+                            ),
+                            AUTOCOMPLETE_QUERY_TIMEOUT,
+                        )
+                    except asyncio.TimeoutError:
+                        queried = []
+                    for member in queried:
+                        members.add(member)
+                    found = members[guild].search(prefix, AUTOCOMPLETE_LIMIT * 2)
+                return member_choices(ctx, found)
+            case _:
+                return []
+
+    async def static_member_autocomplete(
+        ctx: AutocompleteContext,
+    ) -> list[OptionChoice]:
+        match ctx.interaction.channel:
+            case TextChannel(guild=Guild(id=guild_id)) as channel if config.guild(
+                guild_id
+            ):
+                prefix = current_name(ctx).lower()
+                return member_choices(
+                    ctx,
+                    (
+                        member
+                        for member in await load_channel_members(channel)
+                        if any(key.startswith(prefix) for key in member_keys(member))
+                    ),
+                )
+            case _:
+                return []
+
+    async def resolve_members(
+        guild: Guild, names: str | None, role: Role | None
+    ) -> tuple[list[Member], list[str]]:
+        """Members with the names or role, and a line for every name that didn't work"""
+        found: dict[int, Member] = {}
+        problems: list[str] = []
+        await load_members(guild, split_names(names or ""))
+        if config.lean and role is not None and not guild.chunked:
+            # Only the members of the role are needed, but discord can't be asked for those
+            await guild.chunk()
+            members.rebuild(guild)
+        for name in split_names(names or ""):
+            try:
+                member = get_guild_member(guild, name)
+            except CheckFailure as e:
+                problems.append(f"{name}: {e}")
+            else:
+                found[member.id] = member
+        if role is not None:
+            bots_role_id = settings(guild).bots_role_id
+            for member in role.members:
+                if not member.bot and not member.get_role(bots_role_id):
+                    found[member.id] = member
+        if not found and not problems:
+            raise CheckFailure("Please give some names or a role")
+        return list(found.values()), problems
+
+    async def edit_static_members(
+        channel: TextChannel, add: Iterable[Member] = (), remove: Iterable[Member] = ()
+    ):
+        add, remove = list(add), list(remove)
+        role = await static_role(channel)
+        await gather(
+            # One request for all changes, merged with other edits of the channel that are waiting
+            writes.submit(OverwriteEdit(channel, add=add, remove=remove)),
+            # Roles can only be given one member at a time
+            *(
+                writes.submit(RoleEdit(member, role, present))
+                for members, present in ((add, True), (remove, False))
+                for member in members
+                if role is not None
+            ),
+        )
+        static_members.pop(channel.id, None)
+
+    async def static_role(channel: TextChannel) -> Role | None:
+        """The role for mentioning the static, if the bot created one with it"""
+        if not config.static_roles:
+            return None
+        # By id, so renaming the channel keeps it and roles of admins are never picked up
+        role_id = await creators.role(channel)
+        return channel.guild.get_role(role_id) if role_id is not None else None
+
+    def channel_members(channel: TextChannel) -> list[Member]:
+        # Statics grant access through member overwrites only, so there is no need to check the
+        # permissions of every member of the server like channel.members does
         match channel:
             case TextChannel():
-                return (m for m in channel.members if not m.bot)
+                if (cached := static_members.get(channel.id)) is None:
+                    cached = static_members[channel.id] = [
+                        target
+                        for target, overwrite in channel.overwrites.items()
+                        if isinstance(target, Member)
+                        and overwrite.view_channel
+                        and not target.bot
+                    ]
+                return cached
             case _:
                 raise UserVisibleError(f"Cannot get members of {type(channel)}")
 
+    async def load_members(
+        guild: Guild, names: Iterable[str] = (), ids: Iterable[int] = ()
+    ):
+        """In lean mode, ask the gateway for members that aren't cached yet"""
+        if not config.lean:
+            return
+        found: list[Member] = []
+        try:
+            missing = [i for i in ids if guild.get_member(i) is None]
+            for start in range(0, len(missing), QUERY_LIMIT):
+                found += await guild.query_members(
+                    user_ids=missing[start : start + QUERY_LIMIT], limit=QUERY_LIMIT
+                )
+            for name in names:
+                if not members[guild].named(name):
+                    # Queries match the start of user names, tags don't work
+                    query = name.rpartition("#")[0] or name
+                    found += await guild.query_members(query, limit=QUERY_LIMIT)
+        except asyncio.TimeoutError:
+            # Whatever was found is still good, the rest is reported as not on the server
+            pass
+        for member in found:
+            members.add(member)
+        if found:
+            # Overwrites of the new members resolve now
+            static_members.clear()
+
+    async def load_channel_members(channel: TextChannel) -> list[Member]:
+        """channel_members, but making sure that all members are cached in lean mode"""
+        await load_members(
+            channel.guild, ids=(ow.id for ow in channel._overwrites if ow.is_member())
+        )
+        return channel_members(channel)
+
     def ensure_text_channel(channel: InteractionChannel | None) -> TextChannel:
         if channel is None:
             raise UserVisibleError("No channel?!?")
@@ -177,62 +930,287 @@ def make_bot(config: Config) -> Bot:
             raise CheckFailure("Only works in text channels in the static category")
         return channel
 
-    def get_static_channel(category, name) -> TextChannel | None:
+    def get_static_channel(
+        categories: list[CategoryChannel], name: str
+    ) -> TextChannel | None:
         assert name.startswith("static-")
-        try:
-            [channel] = [
-                channel for channel in category.channels if channel.name == name
-            ]
-            return channel
-        except ValueError:
-            return None
+        for category in categories:
+            if channel := index[category.guild].channel(category.id, name):
+                return channel
+        return None
 
     async def creator(channel: TextChannel) -> User | Member:
-        try:
-            [first_message] = await channel.history(
-                limit=1, oldest_first=True
-            ).flatten()
-            [creator, *_] = first_message.mentions
-        except ValueError:
+        # Falls back to the plain user if they left the server
+        creator_id = await creators.get(channel)
+        if creator_id is None:
             raise CheckFailure(f"Failed to determine creator of {channel.name}")
 
-        if isinstance(creator, User):
-            return await channel.guild.fetch_member(42)
-        else:
-            return creator
+        if (member := channel.guild.get_member(creator_id)) is not None:
+            return member
+
+        async def fetch_member():
+            async with fanout.throttle("fetch_member"):
+                return await channel.guild.fetch_member(creator_id)
+
+        async def fetch_user():
+            return await bot.fetch_user(creator_id)
+
+        try:
+            return await reads.do(
+                ("fetch_member", channel.guild.id, creator_id), fetch_member
+            )
+        except NotFound:
+            return bot.get_user(creator_id) or await reads.do(
+                ("fetch_user", creator_id), fetch_user
+            )
+
+    def warned(channel: TextChannel) -> bool:
+        """Whether the last message of the static is a warning, so it's as quiet as before"""
+        if sweeper is not None and sweeper.warned(channel):
+            return True
+        return (message := channel.last_message) is not None and is_warning(message)
+
+    async def retire_roles(channel: TextChannel) -> list[Write]:
+        """Deleting the role of the static and taking the one-channel role from its creator"""
+        reason = "Their static was retired"
+        found: list[Write] = []
+        if (role := await static_role(channel)) is not None:
+            found.append(RoleDelete(role, reason=reason))
+        one_channel_role = get_one_channel_role(channel.guild)
+        if one_channel_role is not None:
+            creator_id = await creators.get(channel)
+            if creator_id:
+                # In lean mode the creator is rarely cached after days of inactivity
+                await load_members(channel.guild, ids=[creator_id])
+            if creator_id and (member := channel.guild.get_member(creator_id)):
+                found.append(RoleEdit(member, one_channel_role, False, reason=reason))
+        return found
+
+    async def record(
+        ctx: ApplicationContext,
+        action: str,
+        channel: TextChannel,
+        *,
+        members: Iterable[Member] = (),
+        **details,
+    ):
+        """Add an entry for the author of the command to the audit log, if there is one"""
+        if ctx.author is not None:
+            await record_as(ctx.author.id, action, channel, members=members, **details)
+
+    async def record_as(
+        actor_id: int,
+        action: str,
+        channel: TextChannel,
+        *,
+        members: Iterable[Member] = (),
+        **details,
+    ):
+        """Add an entry to the audit log, if there is one, leaving out details that are None"""
+        if audit is not None:
+            await audit.record(
+                Entry(
+                    guild_id=channel.guild.id,
+                    actor_id=actor_id,
+                    action=action,
+                    channel_id=channel.id,
+                    member_ids=[m.id for m in members],
+                    details={
+                        "channel": channel.name,
+                        **{k: v for k, v in details.items() if v is not None},
+                    },
+                )
+            )
+
+    async def create_static(
+        ctx: ApplicationContext,
+        guild: Guild,
+        categories: list[CategoryChannel],
+        name: str,
+        author: Member,
+        members: Iterable[Member] = (),
+    ) -> TextChannel:
+        """Create the channel for a static with a valid name that isn't taken"""
+        one_channel_role = get_one_channel_role(guild)
+        members = [m for m in members if m != author]
+
+        async def grant_role():
+            if one_channel_role:
+                await writes.submit(
+                    RoleEdit(author, one_channel_role, True, reason="created a static")
+                )
+
+        new_role: Role | None = None
+
+        async def welcome_with_role() -> Message:
+            nonlocal new_role
+            if not config.static_roles:
+                return await channel.send(f"Welcome to your new group {author.mention}")
+            new_role = await guild.create_role(
+                name=name,
+                mentionable=True,
+                reason=f"For mentioning everyone in {name}",
+            )
+            # The welcome message remembers which role belongs to the static, without pinging it
+            welcome = await channel.send(
+                f"Welcome to your new group {author.mention}, "
+                f"{new_role.mention} mentions everyone in it",
+                allowed_mentions=AllowedMentions(roles=False),
+            )
+            await gather(
+                *(
+                    writes.submit(RoleEdit(member, new_role, True))
+                    for member in [author, *members]
+                )
+            )
+            return welcome
+
+        creating.add((guild.id, name))
+        try:
+            category = await category_with_room(guild, categories[0])
+            placing[category.id] += 1
+            try:
+                # Passing the overwrites here saves a set_permissions call afterwards
+                overwrites = category.overwrites
+                for member in [author, *members]:
+                    overwrites[member] = PermissionOverwrite(view_channel=True)
+                channel = await guild.create_text_channel(
+                    name=name,
+                    reason=f"{author.name} requested the channel",
+                    category=category,
+                    overwrites=overwrites,
+                )
+                # Don't wait for the gateway event, the next create should see it right away
+                index.add(channel)
+
+                granted, welcome = await gather(
+                    grant_role(), welcome_with_role(), return_exceptions=True
+                )
+                errors = [r for r in (granted, welcome) if isinstance(r, BaseException)]
+                if errors:
+                    # Don't leave a channel without a creator or a role without a channel behind
+                    await report_failures(
+                        *(
+                            [writes.submit(RoleEdit(author, one_channel_role, False))]
+                            if one_channel_role is not None and granted is None
+                            else []
+                        ),
+                        *(
+                            [writes.submit(RoleDelete(new_role))]
+                            if new_role is not None
+                            else []
+                        ),
+                        writes.submit(
+                            ChannelDelete(channel, reason="Creating the static failed")
+                        ),
+                    )
+                    index.remove(channel)
+                    raise errors[0]
+            finally:
+                placing[category.id] -= 1
+        finally:
+            creating.discard((guild.id, name))
+
+        assert isinstance(welcome, Message)
+        creators.add(welcome)
+        if ledger is not None:
+            ledger.static(channel, author.id)
+        await record(ctx, "static create", channel, members=members)
+        return channel
+
+    async def report_failures(*aws: Awaitable):
+        """Await all, printing errors instead of raising them"""
+        for result in await gather(*aws, return_exceptions=True):
+            if isinstance(result, BaseException):
+                traceback.print_exception(
+                    type(result), result, result.__traceback__, file=sys.stderr
+                )
 
     def is_admin(member: Member) -> bool:
-        return any(r.id == config.admin_role_id for r in member.roles)
+        return member.get_role(settings(member.guild).admin_role_id) is not None
+
+    def get_one_channel_role(guild: Guild) -> Role | None:
+        role_id = settings(guild).one_channel_role_id
+        return guild.get_role(role_id) if role_id else None
 
     def has_one_channel_role(member: Member) -> bool:
-        return any(role.id == config.one_channel_role_id for role in member.roles)
+        return get_one_channel_role(member.guild) in member.roles
 
     def as_member(member: User | Member | None) -> Member:
         if not isinstance(member, Member):
             raise CheckFailure("The bot only works on a server")
         return member
 
+    async def record_sweep(channel: TextChannel, action: str):
+        # The sweeper acts on its own, the bot is the actor
+        assert bot.user is not None
+        await record_as(bot.user.id, action, channel)
+
+    sweeper = None
+    if config.sweep_inactive_days:
+        sweeper = Sweeper(
+            bot,
+            writes,
+            statics=lambda: [
+                static
+                for guild_id, ours in config.by_guild.items()
+                if (guild := bot.get_guild(guild_id))
+                for static in statics_in(category_pool(guild, ours))
+            ],
+            members=load_channel_members,
+            cleanup=retire_roles,
+            inactive=timedelta(days=config.sweep_inactive_days),
+            grace=timedelta(days=config.sweep_grace_days),
+            archive=lambda channel: settings(channel.guild).archive_category_id,
+            record=record_sweep,
+        )
+
     ########################
     # Common functionality #
     ########################
 
-    if config.blacklist_role_id is not None:
-
-        @bot.check
-        def denylist(ctx: ApplicationContext) -> Literal[True]:
-            assert config.blacklist_role_id is not None
-            if as_member(ctx.author).get_role(config.blacklist_role_id):
-                raise CheckFailure("You are forbidden from using this bot.")
+    @bot.check
+    def denylist(ctx: ApplicationContext) -> Literal[True]:
+        ours = config.guild(ctx.guild_id)
+        if ours is None or ours.blacklist_role_id is None:
             return True
-
-    if config.whitelist_role_id is not None:
-
-        @bot.check
-        def allowlist(ctx: ApplicationContext) -> Literal[True]:
-            assert config.whitelist_role_id is not None
-            if as_member(ctx.author).get_role(config.whitelist_role_id):
-                raise CheckFailure("You are not allowed to using this bot.")
+        if as_member(ctx.author).get_role(ours.blacklist_role_id):
+            raise CheckFailure("You are forbidden from using this bot.")
+        return True
+
+    @bot.check
+    def allowlist(ctx: ApplicationContext) -> Literal[True]:
+        ours = config.guild(ctx.guild_id)
+        if ours is None or ours.whitelist_role_id is None:
+            return True
+        if as_member(ctx.author).get_role(ours.whitelist_role_id):
+            raise CheckFailure("You are not allowed to using this bot.")
+        return True
+
+    @bot.check
+    def slow_down(ctx: ApplicationContext) -> Literal[True]:
+        limits: dict[Hashable, float] = {}
+        if config.user_commands_per_minute and ctx.author is not None:
+            limits["user", ctx.author.id] = config.user_commands_per_minute
+        if config.static_commands_per_minute and (
+            isinstance(ctx.channel, TextChannel) and is_static(ctx.channel)
+        ):
+            limits["static", ctx.channel.id] = config.static_commands_per_minute
+        name = ctx.command.qualified_name
+        if per_minute := config.command_limits.get(name):
+            limits["command", name] = per_minute
+        if not limits:
+            return True
+        # Admins might have to clean up after whoever is going too fast
+        if (
+            isinstance(ctx.author, Member)
+            and config.guild(ctx.guild_id)
+            and is_admin(ctx.author)
+        ):
             return True
+        if wait := throttle.take(limits):
+            raise CheckFailure(f"Slow down, please try again in {ceil(wait)} seconds")
+        return True
 
     ############
     # Commands #
@@ -246,97 +1224,79 @@ def make_bot(config: Config) -> Bot:
     @bot.slash_command(checks=[admin])
     async def check_config(ctx: ApplicationContext):
         """Admin only: Verify that the bot is configured correctly"""
-        good, bad, unkn = ":white_check_mark:", ":exclamation:", ":grey_question:"
-        checked = {"token"}  # We wouldn't be here if that doesn't work
-
-        lines: list[str] = []
-        mk_line = lambda icon, key, msg: " ".join(
-            [icon, *([key] if key else []), *([f": {msg}"] if msg else [])]
-        )
-        add_line = lambda *a: lines.append(mk_line(*a))
-
-        if not isinstance(ctx.me, Member):
+        if ctx.guild is None or not isinstance(ctx.me, Member):
             raise UserVisibleError(
                 "The bot is not a member. Are you using the command on the server?"
             )
+        if (report := reports.get(ctx.guild.id)) is None:
+            report = reports[ctx.guild.id] = verify(ctx.guild)
+        await ctx.respond(report, ephemeral=True)
 
-        if not config.guild_id:
-            add_line(bad, "GUILD_ID", "Missing")
-        else:
-            checked.add("guild_id")
-            ctx.guild
-            if ctx.guild is None or ctx.guild.id != config.guild_id:
-                add_line(unkn, "GUILD_ID", "Configured, but we're not on the server")
-            else:
-                if not config.category_id:
-                    add_line(bad, "CATEGORY_ID", "Not configured")
-                elif not (category := our_category(ctx, ctx.guild)):
-                    add_line(bad, "CATEGORY_ID", "Static category not found")
-                else:
-                    for perm in ["view_channel", "manage_channels"]:
-                        if not getattr(category.permissions_for(ctx.me), perm):
-                            add_line(
-                                bad,
-                                "CATEGORY_ID",
-                                f'Bot needs "{perm}" permissions on the category',
-                            )
-                checked.add("category_id")
-
-                for key in ["ADMIN_ROLE_ID", "BOTS_ROLE_ID"]:
-                    id = getattr(config, key.lower())
-                    if not id:
-                        add_line(bad, key, "Not configured")
-                    elif not ctx.guild.get_role(id):
-                        add_line(bad, key, "Role not found")
-                    checked.add(key.lower())
-
-                for key in [
-                    "BLACKLIST_ROLE_ID",
-                    "WHITELIST_ROLE_ID",
-                    "ONE_CHANNEL_ROLE_ID",
-                ]:
-                    id = getattr(config, key.lower())
-                    if id and not ctx.guild.get_role(id):
-                        add_line(bad, key, "Role not found")
-                    checked.add(key.lower())
-
-                one_channel_role = (
-                    ctx.guild.get_role(config.one_channel_role_id)
-                    if config.one_channel_role_id
-                    else None
-                )
-                if one_channel_role:
-                    try:
-                        await ctx.me.add_roles(one_channel_role)
-                    except Forbidden:
-                        add_line(
-                            bad,
-                            "ONE_CHANNEL_ROLE_ID",
-                            "Bot role must be above the one-channel-role for the bot to manage it",
-                        )
-                    else:
-                        await ctx.me.remove_roles(one_channel_role)
-
-                for perm in ["manage_channels", "manage_roles", "manage_messages"]:
-                    if not getattr(ctx.me.guild_permissions, perm):
-                        add_line(bad, None, f'Bot needs "{perm}" permission')
+    @bot.slash_command(checks=[admin])
+    async def reload_config(ctx: ApplicationContext):
+        """Admin only: Load the config file again, without restarting the bot"""
+        await ctx.respond("\n".join(swap_config()), ephemeral=True)
 
-        unchecked = set(dataclasses.asdict(config).keys()) - checked
+    @bot.slash_command(checks=[admin])
+    async def stats(ctx: ApplicationContext):
+        """Admin only: Show how long commands take"""
+        if metrics is None:
+            raise CheckFailure('Metrics are disabled, set "METRICS" in the config')
+        await ctx.respond(truncate("\n".join(metrics.summary())), ephemeral=True)
 
-        await ctx.respond(
-            "\n".join(
-                [
-                    "Checking bot config:",
-                    *(lines if lines else [":smiling_face_with_3_hearts: All good"]),
-                    *(
-                        ["\nUnchecked values: {', '.join(unchecked)}"]
-                        if unchecked
-                        else []
-                    ),
-                ]
+    @bot.slash_command(
+        options=[
+            Option(
+                User,
+                name="member",
+                description="Only what they did or what was done to them",
+                required=False,
             ),
-            ephemeral=True,
+            Option(
+                TextChannel,
+                name="static",
+                description="Only what happened in this static",
+                required=False,
+            ),
+            Option(
+                int,
+                name="limit",
+                description="How many entries to show, 20 by default",
+                min_value=1,
+                required=False,
+            ),
+        ],
+        checks=[admin],
+    )
+    @guild_only()
+    async def audit_log(
+        ctx: ApplicationContext,
+        member: User | Member | None,
+        static: TextChannel | None,
+        limit: int | None,
+    ):
+        """Admin only: Show who recently did what with statics"""
+        if audit is None:
+            raise CheckFailure(
+                'The audit log is disabled, set "AUDIT_LOG_PATH" in the config'
+            )
+        guild = our_guild(ctx)
+        entries = audit.recent(
+            guild.id,
+            user_id=member.id if member else None,
+            channel_id=static.id if static else None,
+            limit=limit or 20,
         )
+        if not entries:
+            await ctx.respond("Nothing happened recently", ephemeral=True)
+            return
+        pages = Paginator()
+        for entry in entries:
+            if page := pages.add(str(entry)):
+                await ctx.respond(page, ephemeral=True)
+        if audit.dropped:
+            pages.add(f"({audit.dropped} entries were dropped since the bot started)")
+        await ctx.respond(pages.flush(), ephemeral=True)
 
     ###################
     # Static management
@@ -361,14 +1321,10 @@ def make_bot(config: Config) -> Bot:
             raise UserVisibleError(
                 f"Expected author to be a Member but got {type(ctx.author)}"
             )
-        category = our_category(ctx, guild)
+        categories = our_categories(ctx, guild)
 
         # Permission checks
-        one_channel_role = (
-            guild.get_role(config.one_channel_role_id)
-            if config.one_channel_role_id
-            else None
-        )
+        one_channel_role = get_one_channel_role(guild)
         if (
             one_channel_role
             and not is_admin(ctx.author)
@@ -381,28 +1337,16 @@ def make_bot(config: Config) -> Bot:
 
         # Parameter checks
         name = clean_static_name(name)
-        if get_static_channel(category, name) is not None:
+        if (
+            get_static_channel(categories, name) is not None
+            or (guild.id, name) in creating
+        ):
             raise CheckFailure(
                 "Static with that name already exists, please pick another one"
             )
 
-        # Let's do it
-        if one_channel_role:
-            await ctx.author.add_roles(one_channel_role)
-
-        channel = await guild.create_text_channel(
-            name=name,
-            reason=f"{ctx.author.name} requested the channel",
-            category=category,
-        )
-        await channel.set_permissions(
-            ctx.author, view_channel=True, reason="created the static"
-        )
-
-        gather(
-            ctx.respond("Group created, take a look in the server!", ephemeral=True),
-            channel.send(f"Welcome to your new group {ctx.author.mention}"),
-        )
+        await create_static(ctx, guild, categories, name, ctx.author)
+        await ctx.respond("Group created, take a look in the server!", ephemeral=True)
 
     @static.command(
         options=[
@@ -418,58 +1362,144 @@ def make_bot(config: Config) -> Bot:
     async def delete(_cog, ctx: ApplicationContext, name: str):
         """Admin only: Delete a static channel"""
         guild = our_guild(ctx)
-        category = our_category(ctx, guild)
-        one_channel_role = (
-            guild.get_role(config.one_channel_role_id)
-            if config.one_channel_role_id
-            else None
-        )
+        categories = our_categories(ctx, guild)
+        one_channel_role = get_one_channel_role(guild)
         if ctx.author is None:
             raise UserVisibleError("author is None for some reason?!?")
 
         # Parameter checks
         name = clean_static_name(name)
-        channel = get_static_channel(category, name)
+        channel = get_static_channel(categories, name)
         if channel is None:
             raise CheckFailure(f"Couldn't find channel {name}")
 
         if one_channel_role:
             # Find creator and remove one_channel_role
             the_creator = await creator(channel)
-            try:
-                if isinstance(the_creator, User):
-                    the_creator = await guild.fetch_member(the_creator.id)
-                await the_creator.remove_roles(one_channel_role)
-            except NotFound:
+            if isinstance(the_creator, Member):
+                await writes.submit(RoleEdit(the_creator, one_channel_role, False))
+            else:
                 await ctx.respond(
                     f"({the_creator.name} doesn't seem to be on the server anymore)"
                 )
 
-        await channel.delete(reason=f"{ctx.author.name} asked to remove it")
+        reason = f"{ctx.author.name} asked to remove it"
+        role = await static_role(channel)
+        await gather(
+            writes.submit(ChannelDelete(channel, reason=reason)),
+            *([writes.submit(RoleDelete(role, reason=reason))] if role else []),
+        )
+        await record(ctx, "static delete", channel)
         await ctx.respond(f"Group {name} deleted.", ephemeral=True)
 
     @static.command(
         options=[
             Option(
+                int,
                 name="limit",
-                input_type=int,
                 description="Delete this many recent messages",
-            )
+                min_value=1,
+            ),
+            Option(
+                User,
+                name="author",
+                description="Only delete messages from them",
+                required=False,
+            ),
+            Option(
+                name="since",
+                input_type=str,
+                description="Only delete messages from this day on (YYYY-MM-DD)",
+                required=False,
+            ),
+            Option(
+                name="until",
+                input_type=str,
+                description="Only delete messages up to this day (YYYY-MM-DD)",
+                required=False,
+            ),
+            Option(
+                bool,
+                name="pinned",
+                description="Also delete pinned messages, they are kept by default",
+                required=False,
+            ),
         ],
         checks=[admin, in_our_category],
     )
     @guild_only()
-    async def clear(_cog, ctx: ApplicationContext, limit: str):
+    async def clear(
+        _cog,
+        ctx: ApplicationContext,
+        limit: int,
+        author: User | Member | None,
+        since: str | None,
+        until: str | None,
+        pinned: bool | None,
+    ):
         """Admin only: Delete recent messages from the channel"""
-        limit_int = int(limit)
         channel = ensure_text_channel(ctx.channel)
+        after = parse_day(since) if since else None
+        before = parse_day(until) + timedelta(days=1) if until else None
+
+        def check(message: Message) -> bool:
+            if message.pinned and not pinned:
+                return False
+            return author is None or message.author.id == author.id
+
+        async def show(progress: Progress):
+            await ctx.edit(content=f"{progress}...")
+
+        await ctx.defer(ephemeral=True)
+        progress = await purge(
+            channel,
+            fanout,
+            limit,
+            check,
+            after=after,
+            before=before,
+            on_progress=show,
+        )
+        await record(
+            ctx,
+            "static clear",
+            channel,
+            deleted=progress.deleted,
+            failed=progress.failed or None,
+            author_id=author.id if author else None,
+            since=since,
+            until=until,
+        )
+        gone = progress.matched - progress.deleted - progress.failed
+        await ctx.edit(
+            content=f"Deleted {progress.deleted} messages"
+            + (f", {gone} were gone already" if gone else "")
+            + (f", {progress.failed} couldn't be deleted" if progress.failed else "")
+        )
 
-        await channel.purge(limit=limit_int)
-        await ctx.respond(f"Deleted {limit_int} messages", ephemeral=True)
-
-    @static.command(name="list", checks=[admin])
+    @static.command(
+        name="list",
+        options=[
+            Option(
+                int,
+                name="inactive_days",
+                description="Only list statics without messages for more than this many days",
+                required=False,
+            ),
+            Option(
+                input_type=str,
+                name="sort",
+                description="Order of the statics, oldest last message first by default",
+                choices=["last message", "messages"],
+                required=False,
+            ),
+        ],
+        checks=[admin],
+    )
     @guild_only()
-    async def static_list(_cog, ctx: ApplicationContext):
+    async def static_list(
+        _cog, ctx: ApplicationContext, inactive_days: int | None, sort: str | None
+    ):
         """Admin only: List all statics along with the time that the last messag was sent"""
 
         async def creator_string(channel: TextChannel):
@@ -479,53 +1509,277 @@ def make_bot(config: Config) -> Bot:
                 return f"<Error>"
 
         async def last_message(channel: TextChannel) -> str:
-            last_message = await channel.history(limit=1).flatten()
-            try:
-                return last_message[0].created_at.date().isoformat()
-            except ValueError:
+            # The id of the last message encodes its timestamp, no need to ask discord
+            if channel.last_message_id is not None:
+                return snowflake_time(channel.last_message_id).date().isoformat()
+
+            async def read():
+                async with fanout.throttle("channel_history"):
+                    return await channel.history(limit=1).flatten()
+
+            last_message = await reads.do(("channel_history", channel.id, "last"), read)
+            if not last_message:
                 return "???"
+            return last_message[0].created_at.date().isoformat()
+
+        await ctx.defer(ephemeral=True)
+        guild = our_guild(ctx)
+        statics = statics_in(our_categories(ctx, guild))
+        inactive_since = (
+            discord.utils.utcnow() - timedelta(days=inactive_days)
+            if inactive_days
+            else None
+        )
 
-        async def channel_data(channel: TextChannel):
-            [c, l] = await gather(creator_string(channel), last_message(channel))
-            return {
-                "name": channel.name,
-                "creator": c,
-                "last_message": l,
+        # (channel, day of the last message, number of messages)
+        channels: list[tuple[TextChannel, str, int | None]]
+        # channel id -> creator id, from the ledger
+        creator_ids: dict[int, int | None] = {}
+        if ledger is not None:
+            by_id = {static.id: static for static in statics}
+            activities = await ledger.statics(
+                guild.id,
+                inactive_since,
+                order="volume" if sort == "messages" else "activity",
+            )
+            creator_ids = {
+                activity.channel_id: activity.creator_id for activity in activities
             }
+            channels = [
+                (
+                    by_id[activity.channel_id],
+                    activity.last_activity.date().isoformat()
+                    if activity.last_activity
+                    else "???",
+                    activity.message_count,
+                )
+                for activity in activities
+                if activity.channel_id in by_id
+            ]
+        elif sort == "messages":
+            raise CheckFailure(
+                'Sorting by messages needs the activity ledger, see "LEDGER_PATH" in the README'
+            )
+        else:
+            # Last messages are usually known without asking discord, so sort by them first
+            last_messages = await fanout.map(
+                last_message, statics, timeout=config.fanout_timeout
+            )
+            cutoff = inactive_since.date().isoformat() if inactive_since else None
+            channels = sorted(
+                (
+                    (static, last, None)
+                    for static, last in zip(
+                        statics, (l or "???" for l in last_messages)
+                    )
+                    if cutoff is None
+                    or last == "???"
+                    or last < cutoff
+                    or warned(static)
+                ),
+                key=lambda c: c[1],
+            )
+
+        def known_creator(channel: TextChannel) -> str:
+            # The ledger might not know creators that were found after it was last flushed
+            creator_id = creator_ids.get(channel.id) or creators.known(channel.id)
+            if creator_id is None:
+                return "<Unknown>"
+            if user := guild.get_member(creator_id) or bot.get_user(creator_id):
+                return user.name
+            # Mentions in ephemeral messages show the name without notifying anybody
+            return f"<@{creator_id}>"
+
+        async def known_creators():
+            for channel, _, _ in channels:
+                yield known_creator(channel)
+
+        # Send pages as soon as the creators for them are known
+        creator_names = (
+            known_creators()
+            if ledger is not None
+            else fanout.stream(
+                creator_string,
+                (c for c, _, _ in channels),
+                timeout=config.fanout_timeout,
+            )
+        )
 
+        pages = Paginator()
+        pages.add("These are the statics on the server")
+        for channel, last, count in channels:
+            creator_name = await anext(creator_names)
+            line = " - ".join(
+                [
+                    channel.name,
+                    f"Last message on {last}",
+                    *([f"{count} messages"] if count is not None else []),
+                    *(["Warned for inactivity"] if warned(channel) else []),
+                    f"Creator: {creator_name or '<Timed out>'}",
+                ]
+            )
+            if page := pages.add(line):
+                await ctx.respond(page, ephemeral=True)
+
+        pages.add("")
+        pages.add(
+            "Be aware that creator information might not be accurate if "
+            "the welcome message has been deleted or modified"
+        )
+        await ctx.respond(pages.flush(), ephemeral=True)
+
+    @static.command(
+        name="import",
+        options=[
+            Option(
+                # Options only get their type positionally
+                Attachment,
+                name="file",
+                description="JSON or CSV file with the columns name, creator and members",
+            )
+        ],
+        checks=[admin],
+    )
+    @guild_only()
+    async def static_import(_cog, ctx: ApplicationContext, file: Attachment):
+        """Admin only: Create statics from a manifest file"""
         guild = our_guild(ctx)
-        channels = await gather(
-            *[
-                channel_data(channel)
-                for channel in our_category(ctx, guild).channels
-                if isinstance(channel, TextChannel)
-                and channel.name.startswith("static-")
-            ]
+        categories = our_categories(ctx, guild)
+        if not isinstance(ctx.author, Member):
+            raise UserVisibleError(
+                f"Expected author to be a Member but got {type(ctx.author)}"
+            )
+        if file.size > manifest.MAX_BYTES:
+            raise CheckFailure(
+                f"The manifest is too big, at most {manifest.MAX_BYTES // 1024} KiB please"
+            )
+        try:
+            rows = manifest.read(file.filename, await file.read())
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CheckFailure(f"Cannot read the manifest: {e}")
+        if not rows:
+            raise CheckFailure("The manifest is empty")
+
+        # Check everything before creating anything, so a typo doesn't leave half an import
+        keys = {key for row in rows for key in [row.creator, *row.members] if key}
+        await load_members(
+            guild,
+            names=(key for key in keys if not key.isdigit()),
+            ids=(int(key) for key in keys if key.isdigit()),
         )
 
-        channels = sorted(channels, key=lambda entry: entry["last_message"])
+        def find_member(key: str) -> Member:
+            if not key.isdigit():
+                return get_guild_member(guild, key)
+            if (member := guild.get_member(int(key))) is None:
+                raise CheckFailure("That member doesn't exist. Are they on the server?")
+            if member.get_role(settings(guild).bots_role_id):
+                raise CheckFailure("Not operating on bots")
+            return member
+
+        statics: list[tuple[str, Member, list[Member]]] = []
+        problems: list[str] = []
+        names: set[str] = set()
+        for number, row in enumerate(rows, start=1):
+            try:
+                name = clean_static_name(row.name)
+                if name in names:
+                    raise CheckFailure("Static is in the manifest twice")
+                if (
+                    get_static_channel(categories, name) is not None
+                    or (guild.id, name) in creating
+                ):
+                    raise CheckFailure("Static with that name already exists")
+                names.add(name)
+                author = find_member(row.creator) if row.creator else ctx.author
+                joining = [find_member(key) for key in row.members]
+            except CheckFailure as e:
+                problems.append(f"Row {number} ({row.name or 'no name'}): {e}")
+            else:
+                statics.append((name, author, joining))
+        if problems:
+            raise CheckFailure(truncate("\n".join(["Nothing was imported", *problems])))
+
+        async def create_row(
+            static: tuple[str, Member, list[Member]]
+        ) -> tuple[bool, str]:
+            name, author, joining = static
+            # Somebody might have taken the name since the manifest was checked
+            if (
+                get_static_channel(categories, name) is not None
+                or (guild.id, name) in creating
+            ):
+                return False, f"{name}: skipped, a static with that name exists"
+            try:
+                await create_static(ctx, guild, categories, name, author, joining)
+            except Exception as e:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+                return False, f"{name}: failed, {e}"
+            return (
+                True,
+                f"{name}: created for {author.name} with {len(joining)} members",
+            )
+
+        await ctx.defer(ephemeral=True)
+        # The first follow-up would replace the deferred response, which shows the progress
+        await ctx.edit(content=f"Importing {len(statics)} statics...")
+        created = done = 0
+        shown = monotonic()
+        pages = Paginator()
+        async for result in fanout.stream(create_row, statics):
+            # Without a timeout every row gets a result
+            assert result is not None
+            ok, line = result
+            done += 1
+            created += ok
+            if page := pages.add(line):
+                await ctx.respond(page, ephemeral=True)
+            if monotonic() - shown >= PROGRESS_INTERVAL:
+                shown = monotonic()
+                await ctx.edit(content=f"Imported {done} of {len(statics)} statics...")
+        await ctx.respond(pages.flush(), ephemeral=True)
+        await ctx.edit(content=f"Created {created} of {len(statics)} statics")
+
+    @static.command(
+        name="export",
+        options=[
+            Option(
+                input_type=str,
+                name="format",
+                description="Format of the manifest, CSV by default",
+                choices=["csv", "json"],
+                required=False,
+            )
+        ],
+        checks=[admin],
+    )
+    @guild_only()
+    async def static_export(_cog, ctx: ApplicationContext, format: str | None):
+        """Admin only: Download all statics and their members as a manifest file"""
+        guild = our_guild(ctx)
+        statics = statics_in(our_categories(ctx, guild))
+
+        async def row(channel: TextChannel) -> manifest.Row:
+            creator_id = await creators.get(channel)
+            return manifest.Row(
+                name=channel.name.removeprefix("static-"),
+                creator=str(creator_id or ""),
+                members=[
+                    str(member.id) for member in await load_channel_members(channel)
+                ],
+            )
+
+        async def rows():
+            async for found in fanout.stream(row, statics):
+                if found is not None:
+                    yield found
 
+        await ctx.defer(ephemeral=True)
+        format = "json" if format == "json" else "csv"
+        data = await manifest.write(rows(), format)
         await ctx.respond(
-            "\n".join(
-                [
-                    "These are the statics on the server",
-                    *[
-                        " - ".join(
-                            [
-                                c["name"],
-                                f"Last message on {c['last_message']}",
-                                f"Creator: {c['creator']}",
-                            ]
-                        )
-                        for c in channels
-                    ],
-                    "",
-                    (
-                        "Be aware that creator information might not be accurate if "
-                        "the welcome message has been deleted or modified"
-                    ),
-                ]
-            ),
+            f"{len(statics)} statics",
+            file=File(io.BytesIO(data), filename=f"statics.{format}"),
             ephemeral=True,
         )
 
@@ -539,61 +1793,115 @@ def make_bot(config: Config) -> Bot:
             Option(
                 input_type=str,
                 name="name",
-                description="Discord name (NAME#12345) of the server member to add",
-            )
+                description="Discord names (NAME#12345) of the server members to add, separated by commas",
+                autocomplete=guild_member_autocomplete,
+                required=False,
+            ),
+            Option(
+                Role,
+                name="role",
+                description="Add everyone with this role",
+                required=False,
+            ),
         ],
         checks=[in_our_category],
     )
     @guild_only()
-    async def add(_cog, ctx: ApplicationContext, name: str):
-        """Add a new member to this static"""
+    @public_response()
+    async def add(_cog, ctx: ApplicationContext, name: str | None, role: Role | None):
+        """Add new members to this static"""
         guild = our_guild(ctx)
         channel = ensure_text_channel(ctx.channel)
 
-        member = get_guild_member(guild, name)
-
-        await channel.set_permissions(member, view_channel=True)
-        await ctx.respond(f"Folks, say welcome to {member.name}!")
+        found, problems = await resolve_members(guild, name, role)
+        current = await load_channel_members(channel)
+        new = [m for m in found if m not in current]
+        problems += [
+            f"{m.name} is already in the channel" for m in found if m in current
+        ]
+
+        if not new:
+            raise CheckFailure("\n".join(problems))
+        await edit_static_members(channel, add=new)
+        await record(ctx, "member add", channel, members=new)
+        await ctx.respond(
+            truncate(
+                "\n".join(
+                    [
+                        f"Folks, say welcome to {', '.join(m.name for m in new)}!",
+                        *problems,
+                    ]
+                )
+            )
+        )
 
     @member.command(
         options=[
             Option(
                 input_type=str,
                 name="name",
-                description="Discord name (NAME#12345) of the static member to add",
-            )
+                description="Discord names (NAME#12345) of the static members to remove, separated by commas",
+                autocomplete=static_member_autocomplete,
+                required=False,
+            ),
+            Option(
+                Role,
+                name="role",
+                description="Remove everyone with this role",
+                required=False,
+            ),
         ],
         checks=[in_our_category],
     )
     @guild_only()
-    async def remove(_cog, ctx: ApplicationContext, name: str):
-        """Remove a member from this static"""
+    @public_response()
+    async def remove(
+        _cog, ctx: ApplicationContext, name: str | None, role: Role | None
+    ):
+        """Remove members from this static"""
         guild = our_guild(ctx)
         channel = ensure_text_channel(ctx.channel)
 
-        member = get_guild_member(guild, name)
-        if not channel.permissions_for(member).view_channel:
-            raise CheckFailure("That member is not in the channel")
-
-        await channel.set_permissions(member, overwrite=None)
-        await ctx.respond(f"Guys, say goodbye to {member.name}")
+        found, problems = await resolve_members(guild, name, role)
+        current = await load_channel_members(channel)
+        gone = [m for m in found if m in current]
+        problems += [
+            f"{m.name} is not in the channel" for m in found if m not in current
+        ]
+
+        if not gone:
+            raise CheckFailure("\n".join(problems))
+        await edit_static_members(channel, remove=gone)
+        await record(ctx, "member remove", channel, members=gone)
+        await ctx.respond(
+            truncate(
+                "\n".join(
+                    [
+                        f"Guys, say goodbye to {', '.join(m.name for m in gone)}",
+                        *problems,
+                    ]
+                )
+            )
+        )
 
     @member.command(name="list")
     @guild_only()
     async def member_list(_cog, ctx: ApplicationContext):
         """List static members"""
+        await ctx.defer(ephemeral=True)
         channel = ensure_text_channel(ctx.channel)
-        members = channel_members(channel)
+        members = await load_channel_members(channel)
 
-        await ctx.respond(
-            "\n".join(
-                (
-                    "The members of this channel are:",
-                    *sorted(f"- {member.nick or member.name}" for member in members),
-                )
-            ),
-            ephemeral=True,
+        view = PageView(
+            (
+                "The members of this channel are:",
+                *sorted(f"- {member.nick or member.name}" for member in members),
+            )
         )
+        if view.single_page:
+            await ctx.respond(view.current, ephemeral=True)
+        else:
+            await ctx.respond(view.current, view=view, ephemeral=True)
 
     ###############
     # Communication
@@ -610,34 +1918,46 @@ def make_bot(config: Config) -> Bot:
         checks=[in_our_category],
     )
     @guild_only()
+    @public_response()
     async def mention(ctx: ApplicationContext, message: str):
         """Mention everyone in the channel"""
         channel = ensure_text_channel(ctx.channel)
-        members = channel_members(channel)
-        await ctx.respond(
-            "\n".join(
-                (
-                    message or "Hey guys!",
-                    " ".join(member.mention for member in members),
-                )
-            )
+        text = message or "Hey guys!"
+        if (role := await static_role(channel)) is not None:
+            await ctx.respond(f"{text}\n{role.mention}")
+            return
+
+        # Mentioning everyone one by one might take several messages
+        pages = paginate(
+            (member.mention for member in await load_channel_members(channel)),
+            limit=MAX_MESSAGE_LENGTH - len(text) - 1,
+            separator=" ",
         )
+        await ctx.respond(truncate(f"{text}\n{next(pages, '')}".strip()))
+        for page in pages:
+            await ctx.respond(page)
 
     ######
     # Pins
 
     @bot.message_command(checks=[in_our_category])
     @guild_only()
+    @public_response()
     async def pin(ctx: ApplicationContext, message: Message):
         """Add the message to the channel pins"""
         await message.pin(reason=f"pinned by {message.author.name}")
+        channel = ensure_text_channel(ctx.channel)
+        await record(ctx, "pin", channel, message_id=message.id)
         await ctx.respond("pinned it :)")
 
     @bot.message_command(checks=[in_our_category])
     @guild_only()
+    @public_response()
     async def unpin(ctx: ApplicationContext, message: Message):
         """Remove the message from the channel pins"""
         await message.unpin()
+        channel = ensure_text_channel(ctx.channel)
+        await record(ctx, "unpin", channel, message_id=message.id)
         await ctx.respond("unpinned it :)")
 
     return bot
@@ -1,20 +1,174 @@
-from dataclasses import dataclass, fields
+from dataclasses import MISSING, dataclass, field, fields
 import os
 from pathlib import Path
 import json
-from typing import Optional
+from typing import Optional, get_args, get_origin
+
+
+# Only used when the bot starts, reloading the config keeps the values it started with
+STARTUP_ONLY = (
+    "token",
+    "sharded",
+    "fanout_concurrency",
+    "fanout_rate",
+    "write_concurrency",
+    "defer_after",
+    "read_cache_ttl",
+    "lean",
+    "ledger_path",
+    "audit_log_path",
+    "audit_log_max_bytes",
+    "audit_log_backups",
+    "sweep_inactive_days",
+    "sweep_grace_days",
+    "metrics",
+    "metrics_port",
+    "metrics_host",
+)
+
+
+def is_id(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
 
 
 @dataclass
-class Config:
-    token: str
+class GuildConfig:
+    """Settings for one server"""
+
     guild_id: int
     category_id: int
     admin_role_id: int
     bots_role_id: int
-    blacklist_role_id: Optional[int]
-    whitelist_role_id: Optional[int]
-    one_channel_role_id: Optional[int]
+    blacklist_role_id: Optional[int] = None
+    whitelist_role_id: Optional[int] = None
+    one_channel_role_id: Optional[int] = None
+    # Move swept statics to this category instead of deleting them
+    archive_category_id: Optional[int] = None
+    # Categories for statics once CATEGORY_ID is full. The ledger remembers the ones the bot
+    # creates, without a ledger they have to be listed here to be found after a restart
+    overflow_category_ids: list[int] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, conf: dict) -> "GuildConfig":
+        return cls(**{k.lower(): v for k, v in conf.items()})
+
+
+@dataclass
+class Config:
+    token: str
+    # Settings of a single server, other servers go in "GUILDS"
+    guild_id: Optional[int] = None
+    category_id: Optional[int] = None
+    admin_role_id: Optional[int] = None
+    bots_role_id: Optional[int] = None
+    blacklist_role_id: Optional[int] = None
+    whitelist_role_id: Optional[int] = None
+    one_channel_role_id: Optional[int] = None
+    archive_category_id: Optional[int] = None
+    overflow_category_ids: list[int] = field(default_factory=list)
+    # Settings of more servers, objects with the same keys as the single server
+    guilds: list[GuildConfig] = field(default_factory=list)
+    # Guild id -> settings, including the single server
+    by_guild: dict[int, GuildConfig] = field(init=False, repr=False)
+
+    # Run as many shards as discord recommends, for bots on lots of servers
+    sharded: bool = False
+
+    # Tuning, the defaults should be fine for most servers
+    fanout_concurrency: int = 8
+    fanout_rate: float = 10.0
+    fanout_timeout: float = 10.0
+    write_concurrency: int = 4
+    defer_after: float = 2.0
+    read_cache_ttl: float = 30.0
+
+    # Commands per minute (and burst) of a single user, in a single static, and of single commands
+    # across everybody by command name, e.g. {"mention": 10}. Unset means no limit.
+    user_commands_per_minute: Optional[float] = None
+    static_commands_per_minute: Optional[float] = None
+    command_limits: dict[str, float] = field(default_factory=dict)
+
+    # Fewer intents and caches, members are fetched when needed, see "LEAN" in the README
+    lean: bool = False
+
+    # Give every new static a role, so /mention needs a single mention
+    static_roles: bool = False
+
+    # Keep track of activity in statics in a sqlite database at that path
+    ledger_path: Optional[str] = None
+
+    # Log who did what with statics to a JSON lines file at that path, kept in a few files of
+    # at most that size
+    audit_log_path: Optional[str] = None
+    audit_log_max_bytes: int = 10 * 2**20
+    audit_log_backups: int = 5
+
+    # Warn in statics without messages for that many days, then archive or delete them
+    sweep_inactive_days: Optional[int] = None
+    sweep_grace_days: int = 7
+
+    # Metrics for /stats, and in prometheus format on http://METRICS_HOST:METRICS_PORT/metrics
+    metrics: bool = False
+    metrics_port: Optional[int] = None
+    metrics_host: str = "127.0.0.1"
+
+    def __post_init__(self):
+        self.guilds = [
+            g if isinstance(g, GuildConfig) else GuildConfig.load(g)
+            for g in self.guilds
+        ]
+        single = (
+            [
+                GuildConfig(
+                    **{f.name: getattr(self, f.name) for f in fields(GuildConfig)}
+                )
+            ]
+            if self.guild_id is not None
+            else []
+        )
+        self.by_guild = {g.guild_id: g for g in [*single, *self.guilds]}
+
+    def guild(self, guild_id: Optional[int]) -> Optional[GuildConfig]:
+        """Settings of the server, None for servers that the bot isn't set up for"""
+        return self.by_guild.get(guild_id) if guild_id is not None else None
+
+    def problems(self) -> list[str]:
+        """Everything that is obviously wrong, without looking at discord"""
+        found = []
+        if not self.by_guild:
+            found.append('No server configured, set "GUILD_ID" or "GUILDS"')
+        ids = [g.guild_id for g in self.guilds]
+        if self.guild_id is not None:
+            ids.append(self.guild_id)
+        for guild_id in {i for i in ids if ids.count(i) > 1}:
+            found.append(f"Server {guild_id} is configured twice")
+        for guild in self.by_guild.values():
+            for f in fields(GuildConfig):
+                value = getattr(guild, f.name)
+                if value is None and f.default is not MISSING:
+                    continue
+                if f.name == "overflow_category_ids":
+                    if not isinstance(value, list) or not all(map(is_id, value)):
+                        found.append(
+                            f"{f.name.upper()} of server {guild.guild_id} should be a list of ids, not {value!r}"
+                        )
+                    continue
+                if not is_id(value):
+                    found.append(
+                        f"{f.name.upper()} of server {guild.guild_id} should be an id, not {value!r}"
+                    )
+        limits = {
+            "USER_COMMANDS_PER_MINUTE": self.user_commands_per_minute,
+            "STATIC_COMMANDS_PER_MINUTE": self.static_commands_per_minute,
+            **{f"COMMAND_LIMITS {k}": v for k, v in self.command_limits.items()},
+        }
+        for key, limit in limits.items():
+            # A bucket holds as many tokens as its limit, below 1 it could never allow a command
+            if limit is not None and not (
+                isinstance(limit, (int, float)) and limit >= 1
+            ):
+                found.append(f"{key} should be a number of at least 1, not {limit!r}")
+        return found
 
     @classmethod
     def load(cls, token_file: Path, config_file: Path):
@@ -27,12 +181,25 @@ class Config:
 
     @classmethod
     def load_from_environment(cls):
-        config = {
-            f.name: os.environ.get(f"DISCORD_STATIC_BOT_{f.name.upper()}") for f in fields(cls)
-        }
-        config = {
-            k: int(v) if v and issubclass(int, cls.__dataclass_fields__[k].type) else v
-            for k, v in config.items()
-        }
+        def convert(type_, value: str):
+            if get_origin(type_) in (list, dict):
+                return json.loads(value)
+            types = get_args(type_) or (type_,)
+            for t in (bool, int, float):
+                if t in types:
+                    return (
+                        value.lower() in ("1", "true", "yes") if t is bool else t(value)
+                    )
+            return value
+
+        config = {}
+        for f in fields(cls):
+            if not f.init:
+                continue
+            value = os.environ.get(f"DISCORD_STATIC_BOT_{f.name.upper()}")
+            if value:
+                config[f.name] = convert(f.type, value)
+            elif f.default is MISSING and f.default_factory is MISSING:
+                config[f.name] = None
 
         return cls(**config)  # type: ignore
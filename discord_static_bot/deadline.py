@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable
+
+from discord import ApplicationContext, Bot, HTTPException, InteractionResponded
+from discord.utils import snowflake_time, utcnow
+
+
+def public_response() -> Callable:
+    """A decorator for commands that answer everyone, so they are deferred publicly
+
+    Commands are deferred ephemerally otherwise. Use it like guild_only(), right above the
+    function.
+    """
+
+    def inner(func: Callable):
+        setattr(func, "__public_response__", True)
+        return func
+
+    return inner
+
+
+class DeadlineContext(ApplicationContext):
+    # Deferred publicly and nothing answered yet. The first follow-up replaces the public
+    # "thinking" message and stays public, even if it asks to be ephemeral.
+    public_placeholder = False
+
+    @property
+    def defer(self) -> Callable[..., Awaitable[None]]:
+        # Commands that defer on their own might have been deferred automatically already
+        async def defer(*args, **kwargs):
+            try:
+                await self.interaction.response.defer(*args, **kwargs)
+            except InteractionResponded:
+                return
+            self.public_placeholder = not kwargs.get("ephemeral", False)
+
+        return defer
+
+    async def respond(self, *args, **kwargs):
+        response = await super().respond(*args, **kwargs)
+        self.public_placeholder = False
+        return response
+
+    async def respond_privately(self, content: str):
+        """Respond ephemerally, even if the command was deferred publicly"""
+        if self.public_placeholder:
+            try:
+                await self.delete()
+            except HTTPException:
+                # The follow-up still works, it's just public
+                pass
+            self.public_placeholder = False
+        await self.respond(content, ephemeral=True)
+
+
+def auto_defer(bot: Bot, after: float):
+    """Defer every command that hasn't responded `after` seconds into the interaction
+
+    Discord drops interactions that aren't answered within 3 seconds. Once deferred, ctx.respond() sends a follow-up, so commands don't have to care.
+    """
+    invoke = bot.invoke_application_command
+
+    async def defer_in_time(ctx: ApplicationContext):
+        # The interaction might have waited in our event loop for a while already
+        age = (utcnow() - snowflake_time(ctx.interaction.id)).total_seconds()
+        await asyncio.sleep(min(max(after - age, 0), after))
+        response = ctx.interaction.response
+        # Locked while the command is responding on its own
+        if response.is_done() or response._response_lock.locked():
+            return
+        callback = getattr(ctx.command, "callback", None)
+        public = getattr(callback, "__public_response__", False)
+        try:
+            await ctx.defer(ephemeral=not public)
+        except (HTTPException, InteractionResponded):
+            # Too late already, or the command responded in the meantime
+            pass
+
+    async def invoke_with_deadline(ctx: ApplicationContext):
+        timer = asyncio.create_task(defer_in_time(ctx))
+        try:
+            await invoke(ctx)
+        finally:
+            timer.cancel()
+
+    bot.invoke_application_command = invoke_with_deadline  # type: ignore
+    bot.get_application_context = partial(  # type: ignore
+        Bot.get_application_context, bot, cls=DeadlineContext
+    )
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def take(self):
+        # The lock keeps waiters in order, so nobody starves under contention
+        async with self._lock:
+            while not self.try_take():
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FanOut:
+    """Runs work for many items at once without flooding the discord api
+
+    map() caps how many items are worked on concurrently, throttle() limits the request rate per
+    route. Each request to a route should be wrapped in throttle(), whether it's part of a map()
+    or not, so that all users of a route share one budget.
+    """
+
+    def __init__(self, concurrency: int, rate: float, burst: float | None = None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._rate = rate
+        self._burst = burst if burst is not None else rate
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @asynccontextmanager
+    async def throttle(self, route: str):
+        if (bucket := self._buckets.get(route)) is None:
+            bucket = self._buckets[route] = TokenBucket(self._rate, self._burst)
+        await bucket.take()
+        yield
+
+    def _start(
+        self, fn: Callable[[T], Awaitable[R]], items: Iterable[T]
+    ) -> list[asyncio.Task[R]]:
+        async def run(item: T) -> R:
+            async with self._semaphore:
+                return await fn(item)
+
+        return [asyncio.ensure_future(run(item)) for item in items]
+
+    async def map(
+        self,
+        fn: Callable[[T], Awaitable[R]],
+        items: Iterable[T],
+        timeout: float | None = None,
+    ) -> list[R | None]:
+        """Results in the order of items, with None for items that didn't finish in time"""
+        tasks = self._start(fn, items)
+        if not tasks:
+            return []
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        return [task.result() if task in done else None for task in tasks]
+
+    async def stream(
+        self,
+        fn: Callable[[T], Awaitable[R]],
+        items: Iterable[T],
+        timeout: float | None = None,
+    ) -> AsyncIterator[R | None]:
+        """Like map(), but yields each result as soon as all results before it are done"""
+        tasks = self._start(fn, items)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for task in tasks:
+                remaining = (
+                    None if deadline is None else max(deadline - time.monotonic(), 0)
+                )
+                done, _ = await asyncio.wait([task], timeout=remaining)
+                yield task.result() if done else None
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+MAX_RESULTS = 1000
+
+
+class SingleFlight:
+    """Reads from discord that are made once, however many callers want them at the same time
+
+    Keys start with the route, e.g. ("fetch_member", guild_id, user_id). Callers with the key of
+    a read that is in flight wait for it instead of sending their own. Results are kept for
+    `ttl` seconds, up to `max_results` of them, errors aren't kept.
+    """
+
+    def __init__(self, ttl: float, max_results: int = MAX_RESULTS):
+        self._ttl = ttl
+        self._max_results = max_results
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # key -> (expiry, result), oldest first
+        self._results: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # By route: answered from the cache, waited for a read in flight, sent a read
+        self.hits: Counter[str] = Counter()
+        self.shared: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    async def do(
+        self,
+        key: tuple,
+        read: Callable[[], Awaitable[T]],
+        cache: bool = True,
+    ) -> T:
+        route = key[0]
+        if cache and (cached := self._results.get(key)) is not None:
+            expiry, result = cached
+            if expiry > time.monotonic():
+                self.hits[route] += 1
+                return result
+            del self._results[key]
+
+        if (task := self._inflight.get(key)) is not None:
+            self.shared[route] += 1
+        else:
+            self.misses[route] += 1
+            task = self._inflight[key] = asyncio.create_task(
+                self._read(key, read, cache)
+            )
+            # Nobody might be waiting anymore when it fails
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        # A caller that gives up doesn't cancel the read for the others
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable):
+        self._results.pop(key, None)
+
+    async def _read(
+        self, key: Hashable, read: Callable[[], Awaitable[T]], cache: bool
+    ) -> T:
+        try:
+            result = await read()
+        finally:
+            del self._inflight[key]
+        if cache:
+            self._results[key] = (time.monotonic() + self._ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self._max_results:
+                self._results.popitem(last=False)
+        return result
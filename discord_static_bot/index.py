@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import sys
+import traceback
+from collections import Counter
+from typing import Iterable
+
+from discord import CategoryChannel, Guild, Message, TextChannel
+from discord.abc import GuildChannel
+
+from .fanout import FanOut
+from .flight import SingleFlight
+
+# Discord doesn't allow more channels in a category
+CATEGORY_LIMIT = 50
+
+
+def overflow_name(base: CategoryChannel, number: int) -> str:
+    return f"{base.name} ({number})"
+
+
+class GuildIndex:
+    """Categories by id and text channels by (category id, name) for one guild"""
+
+    def __init__(self, guild: Guild):
+        self.categories: dict[int, CategoryChannel] = {}
+        self.channels: dict[int | None, dict[str, TextChannel]] = {}
+        # Number of channels of any type in each category
+        self.sizes: Counter[int | None] = Counter()
+        # Where each indexed channel was filed, so events can be applied more than once
+        self._placed: dict[int, tuple[int | None, str | None]] = {}
+        for channel in guild.channels:
+            self.add(channel)
+
+    def add(self, channel: GuildChannel):
+        if isinstance(channel, CategoryChannel):
+            self.categories[channel.id] = channel
+            return
+
+        self.remove(channel)
+        name = None
+        if isinstance(channel, TextChannel):
+            name = channel.name
+            self.channels.setdefault(channel.category_id, {})[name] = channel
+        self.sizes[channel.category_id] += 1
+        self._placed[channel.id] = (channel.category_id, name)
+
+    def remove(self, channel: GuildChannel):
+        if isinstance(channel, CategoryChannel):
+            self.categories.pop(channel.id, None)
+            return
+
+        if (placed := self._placed.pop(channel.id, None)) is None:
+            return
+        category_id, name = placed
+        self.sizes[category_id] -= 1
+        if name is None:
+            # Only text channels are indexed by name
+            return
+        by_name = self.channels.get(category_id, {})
+        # Discord allows duplicate names, don't drop a different channel
+        if (known := by_name.get(name)) and known.id == channel.id:
+            del by_name[name]
+
+    def category(self, category_id: int) -> CategoryChannel | None:
+        return self.categories.get(category_id)
+
+    def pool(self, base_id: int, overflow_ids: Iterable[int]) -> list[CategoryChannel]:
+        """The base category followed by those of its overflow categories that still exist"""
+        if (base := self.categories.get(base_id)) is None:
+            return []
+        # By id, names can be changed and copied by anyone who manages channels
+        ids = dict.fromkeys(i for i in overflow_ids if i != base_id)
+        return [base, *(self.categories[i] for i in ids if i in self.categories)]
+
+    def channel(self, category_id: int, name: str) -> TextChannel | None:
+        return self.channels.get(category_id, {}).get(name)
+
+    def statics(self, category_id: int) -> list[TextChannel]:
+        return [
+            channel
+            for name, channel in self.channels.get(category_id, {}).items()
+            if name.startswith("static-")
+        ]
+
+
+class StaticIndex:
+    """Per-guild GuildIndex, kept current from gateway channel events"""
+
+    def __init__(self):
+        self._guilds: dict[int, GuildIndex] = {}
+
+    def rebuild(self, guild: Guild) -> GuildIndex:
+        index = self._guilds[guild.id] = GuildIndex(guild)
+        return index
+
+    def drop(self, guild: Guild):
+        self._guilds.pop(guild.id, None)
+
+    def __getitem__(self, guild: Guild) -> GuildIndex:
+        # Commands can arrive before on_ready, build lazily in that case
+        if (index := self._guilds.get(guild.id)) is None:
+            index = self.rebuild(guild)
+        return index
+
+    def add(self, channel: GuildChannel):
+        self[channel.guild].add(channel)
+
+    def remove(self, channel: GuildChannel):
+        self[channel.guild].remove(channel)
+
+    def update(self, before: GuildChannel, after: GuildChannel):
+        # The index remembers where the channel was, so before isn't needed
+        self[after.guild].add(after)
+
+
+class CreatorIndex:
+    """Creator and role of each static, as mentioned in the welcome message of its channel"""
+
+    def __init__(self, fanout: FanOut, reads: SingleFlight):
+        self._fanout = fanout
+        self._reads = reads
+        # channel id -> (welcome message id, creator id, role id). A creator id of None means
+        # that the welcome message doesn't mention anyone, which is cached too to avoid
+        # refetching. Only statics created with a role mention it in the welcome message.
+        self._entries: dict[int, tuple[int, int | None, int | None]] = {}
+
+    def add(self, welcome: Message):
+        creator = welcome.mentions[0].id if welcome.mentions else None
+        # Parsed from the content, the role doesn't have to be cached or pinged for that
+        role = welcome.raw_role_mentions[0] if welcome.raw_role_mentions else None
+        self._entries[welcome.channel.id] = (welcome.id, creator, role)
+
+    def forget(self, channel_id: int):
+        self._entries.pop(channel_id, None)
+
+    def invalidate(self, channel_id: int, message_id: int):
+        match self._entries.get(channel_id):
+            case (welcome_id, _, _) if welcome_id == message_id:
+                del self._entries[channel_id]
+
+    def known(self, channel_id: int) -> int | None:
+        """The creator if it's cached, without asking discord"""
+        return self._entries.get(channel_id, (0, None, None))[1]
+
+    async def get(self, channel: TextChannel) -> int | None:
+        return (await self._entry(channel))[1]
+
+    async def role(self, channel: TextChannel) -> int | None:
+        """The id of the role the bot created for mentioning the static"""
+        return (await self._entry(channel))[2]
+
+    async def _entry(self, channel: TextChannel) -> tuple[int, int | None, int | None]:
+        if channel.id not in self._entries:
+            await self._load(channel)
+        return self._entries.get(channel.id, (0, None, None))
+
+    async def _load(self, channel: TextChannel):
+        async def first_message():
+            async with self._fanout.throttle("channel_history"):
+                return await channel.history(limit=1, oldest_first=True).flatten()
+
+        # Only shared with concurrent loads, the entries are the cache
+        welcome = await self._reads.do(
+            ("channel_history", channel.id, "first"), first_message, cache=False
+        )
+        if welcome:
+            self.add(welcome[0])
+
+    async def warm(self, channels: Iterable[TextChannel]):
+        async def load(channel: TextChannel):
+            if channel.id in self._entries:
+                return
+            try:
+                await self._load(channel)
+            except Exception as e:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+
+        await self._fanout.map(load, channels)
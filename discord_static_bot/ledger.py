@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import sys
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Literal
+
+from discord import Message, TextChannel
+from discord.utils import snowflake_time
+
+from .sweep import is_warning
+
+FLUSH_INTERVAL = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statics (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    creator_id INTEGER,
+    created_at REAL NOT NULL,
+    last_activity REAL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS statics_by_activity ON statics (guild_id, last_activity);
+CREATE INDEX IF NOT EXISTS statics_by_volume ON statics (guild_id, message_count);
+CREATE TABLE IF NOT EXISTS overflow_categories (
+    category_id INTEGER PRIMARY KEY,
+    base_id INTEGER NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO statics (channel_id, guild_id, name, creator_id, created_at, last_activity)
+VALUES (:channel_id, :guild_id, :name, :creator_id, :created_at, :last_activity)
+ON CONFLICT (channel_id) DO UPDATE SET
+    guild_id = excluded.guild_id,
+    name = excluded.name,
+    creator_id = COALESCE(excluded.creator_id, statics.creator_id),
+    last_activity = MAX(
+        COALESCE(excluded.last_activity, statics.last_activity),
+        COALESCE(statics.last_activity, excluded.last_activity)
+    )
+"""
+
+COUNT_MESSAGES = """
+UPDATE statics
+SET message_count = message_count + :count,
+    last_activity = MAX(COALESCE(last_activity, 0), :last_activity)
+WHERE channel_id = :channel_id
+"""
+
+Order = Literal["activity", "volume"]
+
+
+@dataclass
+class Activity:
+    channel_id: int
+    creator_id: int | None
+    created_at: datetime
+    last_activity: datetime | None
+    message_count: int
+
+
+def timestamp(when: datetime | None) -> float | None:
+    return when.timestamp() if when is not None else None
+
+
+class Ledger:
+    """Creator, creation time, last activity and message count of every static, in sqlite
+
+    Events only update pending changes in memory, a background task writes them in batches. The
+    message count only includes messages sent while the bot was running with the ledger. It also
+    remembers the overflow categories that the bot created.
+    """
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        # One thread uses the connection at a time
+        self._lock = asyncio.Lock()
+        self._known: set[int] = {
+            channel_id
+            for (channel_id,) in self._db.execute("SELECT channel_id FROM statics")
+        }
+        self._upserts: dict[int, dict] = {}
+        self._messages: dict[int, tuple[int, float]] = {}
+        self._deletes: set[int] = set()
+        # channel id -> id of the warning that is the last message, it isn't activity
+        self._warnings: dict[int, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._known
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_regularly())
+
+    #############
+    # Recording #
+    #############
+
+    def static(self, channel: TextChannel, creator_id: int | None = None):
+        """Start tracking a static or update its name"""
+        last = channel.last_message_id
+        if last is not None and self._warnings.get(channel.id) == last:
+            last = None
+        self._known.add(channel.id)
+        self._deletes.discard(channel.id)
+        self._upserts[channel.id] = {
+            "channel_id": channel.id,
+            "guild_id": channel.guild.id,
+            "name": channel.name,
+            "creator_id": creator_id,
+            "created_at": channel.created_at.timestamp(),
+            "last_activity": timestamp(snowflake_time(last) if last else None),
+        }
+
+    def creator(self, channel: TextChannel, creator_id: int | None):
+        if channel.id in self._known and creator_id is not None:
+            self.static(channel, creator_id)
+
+    def message(self, message: Message):
+        if message.channel.id not in self._known:
+            return
+        if is_warning(message):
+            self._warnings[message.channel.id] = message.id
+            return
+        self._warnings.pop(message.channel.id, None)
+        count, _ = self._messages.get(message.channel.id, (0, 0.0))
+        self._messages[message.channel.id] = (
+            count + 1,
+            message.created_at.timestamp(),
+        )
+
+    def remove(self, channel_id: int):
+        if channel_id in self._known:
+            self._known.discard(channel_id)
+            self._upserts.pop(channel_id, None)
+            self._messages.pop(channel_id, None)
+            self._warnings.pop(channel_id, None)
+            self._deletes.add(channel_id)
+
+    def sync(self, guild_id: int, statics: Iterable[TextChannel]):
+        """Track exactly these statics for the guild, e.g. after being offline for a while"""
+        current = set()
+        for static in statics:
+            current.add(static.id)
+            self.static(static)
+        stale = [
+            channel_id
+            for (channel_id,) in self._db.execute(
+                "SELECT channel_id FROM statics WHERE guild_id = ?", (guild_id,)
+            )
+            if channel_id not in current
+        ]
+        for channel_id in stale:
+            self.remove(channel_id)
+
+    ###########
+    # Writing #
+    ###########
+
+    async def _flush_regularly(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+
+    async def flush(self):
+        upserts, self._upserts = list(self._upserts.values()), {}
+        messages, self._messages = self._messages, {}
+        deletes, self._deletes = self._deletes, set()
+        if not (upserts or messages or deletes):
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._write, upserts, messages, deletes)
+
+    def _write(
+        self,
+        upserts: list[dict],
+        messages: dict[int, tuple[int, float]],
+        deletes: set[int],
+    ):
+        with self._db:
+            self._db.executemany(UPSERT, upserts)
+            self._db.executemany(
+                COUNT_MESSAGES,
+                (
+                    {"channel_id": channel_id, "count": count, "last_activity": last}
+                    for channel_id, (count, last) in messages.items()
+                ),
+            )
+            self._db.executemany(
+                "DELETE FROM statics WHERE channel_id = ?",
+                ((channel_id,) for channel_id in deletes),
+            )
+
+    async def overflow(self, category_id: int, base_id: int):
+        """Remember an overflow category right away, a lost one would never be used again"""
+        async with self._lock:
+            await asyncio.to_thread(self._write_overflow, category_id, base_id)
+
+    def _write_overflow(self, category_id: int, base_id: int):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO overflow_categories (category_id, base_id) VALUES (?, ?)",
+                (category_id, base_id),
+            )
+
+    ###########
+    # Reading #
+    ###########
+
+    def overflows(self) -> dict[int, list[int]]:
+        """Ids of the overflow categories by base category id, oldest first"""
+        found: dict[int, list[int]] = {}
+        for category_id, base_id in self._db.execute(
+            "SELECT category_id, base_id FROM overflow_categories ORDER BY category_id"
+        ):
+            found.setdefault(base_id, []).append(category_id)
+        return found
+
+    async def statics(
+        self,
+        guild_id: int,
+        inactive_since: datetime | None = None,
+        order: Order = "activity",
+    ) -> list[Activity]:
+        """Statics of the guild without activity since the given time, if any"""
+        await self.flush()
+        query = "SELECT channel_id, creator_id, created_at, last_activity, message_count FROM statics WHERE guild_id = ?"
+        params: list = [guild_id]
+        if inactive_since is not None:
+            query += " AND (last_activity IS NULL OR last_activity < ?)"
+            params.append(inactive_since.timestamp())
+        query += {
+            "activity": " ORDER BY last_activity",
+            "volume": " ORDER BY message_count DESC",
+        }[order]
+
+        async with self._lock:
+            rows = await asyncio.to_thread(
+                lambda: self._db.execute(query, params).fetchall()
+            )
+        from_timestamp = lambda ts: datetime.fromtimestamp(ts, timezone.utc)
+        return [
+            Activity(
+                channel_id=channel_id,
+                creator_id=creator_id,
+                created_at=from_timestamp(created_at),
+                last_activity=from_timestamp(last) if last is not None else None,
+                message_count=count,
+            )
+            for channel_id, creator_id, created_at, last, count in rows
+        ]
@@ -1,4 +1,5 @@
 import os
+from functools import partial
 from pathlib import Path
 
 from .bot import make_bot
@@ -8,6 +9,10 @@ import sys
 def main():
     if 'DISCORD_STATIC_BOT_TOKEN' in os.environ:
         config = Config.load_from_environment()
+        bot = make_bot(config)
     else:
-        config = Config.load(Path('token.txt'), Path(sys.argv[1]))
-    make_bot(config).run(config.token)
+        config_file = Path(sys.argv[1])
+        load = partial(Config.load, Path('token.txt'), config_file)
+        config = load()
+        bot = make_bot(config, load_config=load, watch=config_file)
+    bot.run(config.token)
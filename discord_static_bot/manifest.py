@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterable, Literal
+
+# Way more than a season's worth of statics
+MAX_BYTES = 2**20
+COLUMNS = ("name", "creator", "members")
+
+Format = Literal["csv", "json"]
+
+
+@dataclass
+class Row:
+    """One static: its name without "static-", and ids or names of its creator and members"""
+
+    name: str
+    creator: str = ""
+    members: list[str] = field(default_factory=list)
+
+
+def split(members: str) -> list[str]:
+    return [member.strip() for member in members.split(",") if member.strip()]
+
+
+def read(filename: str, data: bytes) -> list[Row]:
+    """Rows of a JSON list of objects or a CSV file with a header, raises ValueError"""
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        entries = json.loads(text)
+        if not isinstance(entries, list) or not all(
+            isinstance(e, dict) for e in entries
+        ):
+            raise ValueError("Expected a list of objects")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if reader.fieldnames is None or "name" not in reader.fieldnames:
+            raise ValueError(f"Expected a header with the columns {', '.join(COLUMNS)}")
+        entries = list(reader)
+
+    rows = []
+    for entry in entries:
+        members = entry.get("members") or []
+        rows.append(
+            Row(
+                name=str(entry.get("name") or "").strip(),
+                creator=str(entry.get("creator") or "").strip(),
+                members=(
+                    split(members)
+                    if isinstance(members, str)
+                    else [str(member) for member in members]
+                ),
+            )
+        )
+    return rows
+
+
+async def write(rows: AsyncIterable[Row], format: Format) -> bytes:
+    """The manifest, written row by row as they come in"""
+    out = io.StringIO()
+    if format == "json":
+        out.write("[")
+        first = True
+        async for row in rows:
+            out.write("\n  " if first else ",\n  ")
+            out.write(json.dumps(asdict(row)))
+            first = False
+        out.write("\n]\n")
+    else:
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        async for row in rows:
+            writer.writerow([row.name, row.creator, ", ".join(row.members)])
+    return out.getvalue().encode()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+
+from discord import Guild, Member
+
+
+def member_tag(member: Member) -> str:
+    """What users type to refer to a member: NAME#1234, or just the name for new usernames"""
+    if member.discriminator in ("0", "0000"):
+        return member.name
+    return f"{member.name}#{member.discriminator}"
+
+
+def member_keys(member: Member) -> set[str]:
+    names = [
+        member.name,
+        member_tag(member),
+        getattr(member, "global_name", None),
+        member.nick,
+    ]
+    return {name.lower() for name in names if name}
+
+
+class GuildMembers:
+    """Members of one guild, searchable by (prefix of) name, global name, nick and tag
+
+    Keys are kept in a sorted list of (key, member id) so that all keys starting with a prefix
+    are next to each other and can be found with a binary search.
+    """
+
+    def __init__(self, guild: Guild):
+        self._members: dict[int, Member] = {}
+        self._keys: dict[int, set[str]] = {}
+        for member in guild.members:
+            self._members[member.id] = member
+            self._keys[member.id] = member_keys(member)
+        self._sorted: list[tuple[str, int]] = sorted(
+            (key, member_id) for member_id, keys in self._keys.items() for key in keys
+        )
+
+    def add(self, member: Member):
+        self.remove(member.id)
+        self._members[member.id] = member
+        self._keys[member.id] = keys = member_keys(member)
+        for key in keys:
+            insort(self._sorted, (key, member.id))
+
+    def remove(self, member_id: int):
+        self._members.pop(member_id, None)
+        for key in self._keys.pop(member_id, ()):
+            i = bisect_left(self._sorted, (key, member_id))
+            if i < len(self._sorted) and self._sorted[i] == (key, member_id):
+                del self._sorted[i]
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._members
+
+    def named(self, name: str) -> list[Member]:
+        """Members that have exactly that name, global name, nick or tag (ignoring case)"""
+        key = name.lower()
+        i = bisect_left(self._sorted, (key,))
+        found = []
+        while i < len(self._sorted) and self._sorted[i][0] == key:
+            found.append(self._members[self._sorted[i][1]])
+            i += 1
+        return found
+
+    def search(self, prefix: str, limit: int = 25) -> list[Member]:
+        prefix = prefix.lower()
+        found: dict[int, Member] = {}
+        i = bisect_left(self._sorted, (prefix,))
+        while (
+            len(found) < limit
+            and i < len(self._sorted)
+            and self._sorted[i][0].startswith(prefix)
+        ):
+            member_id = self._sorted[i][1]
+            found.setdefault(member_id, self._members[member_id])
+            i += 1
+        return list(found.values())
+
+
+class MemberIndex:
+    """Per-guild GuildMembers, kept current from gateway member events"""
+
+    def __init__(self):
+        self._guilds: dict[int, GuildMembers] = {}
+
+    def rebuild(self, guild: Guild) -> GuildMembers:
+        members = self._guilds[guild.id] = GuildMembers(guild)
+        return members
+
+    def drop(self, guild: Guild):
+        self._guilds.pop(guild.id, None)
+
+    def __getitem__(self, guild: Guild) -> GuildMembers:
+        if (members := self._guilds.get(guild.id)) is None:
+            members = self.rebuild(guild)
+        return members
+
+    def add(self, member: Member):
+        self[member.guild].add(member)
+
+    def remove(self, member: Member):
+        self[member.guild].remove(member.id)
+
+    def refresh(self, user_id: int, guilds: list[Guild]):
+        """Re-index a user whose name changed in all guilds where they're a member"""
+        for guild in guilds:
+            if (member := guild.get_member(user_id)) is not None:
+                self[guild].add(member)
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from discord import ApplicationContext, Bot
+from discord.webhook.async_ import async_context
+
+from .flight import SingleFlight
+
+# Upper bounds in seconds, like the prometheus client's defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("checks", "api", "respond", "other")
+LAG_INTERVAL = 0.5
+
+
+def resident_memory() -> int | None:
+    """Bytes of memory that the process uses right now, if the system tells"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # The last count is for values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket the quantile falls into"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+@dataclass
+class Timing:
+    """Where the time of one command invocation goes"""
+
+    start: float = field(default_factory=time.perf_counter)
+    checked: float | None = None
+    api: float = 0.0
+    respond: float = 0.0
+
+
+# The invocation that api calls are made for. Tasks started by a command inherit it.
+current: ContextVar[Timing | None] = ContextVar("current_timing", default=None)
+
+
+class Metrics:
+    """Latency of commands, split into phases, plus rate limit hits and event loop lag
+
+    Only made when metrics are enabled, so that disabled metrics cost nothing.
+
+    Phases are the checks, waiting for the discord api, sending the response to the interaction
+    and everything else. Api calls of concurrent requests are summed up, so phases can add up to
+    more than the total.
+    """
+
+    def __init__(self):
+        self.latency: dict[str, Histogram] = defaultdict(Histogram)
+        self.phases: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.errors: Counter[str] = Counter()
+        self.api_calls: Counter[str] = Counter()
+        self.rate_limits = 0
+        self.lag = Histogram()
+        self.last_lag = 0.0
+        self.write_queue_depth = 0
+        # Reads shared between commands, for how many requests that saves
+        self.reads: SingleFlight | None = None
+        # From making the bot until it is ready, set once it is
+        self.startup_seconds: float | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    def instrument(self, bot: Bot):
+        invoke = bot.invoke_application_command
+
+        async def timed_invoke(ctx: ApplicationContext):
+            # The http client and the webhook adapter might have been swapped since make_bot
+            self._wrap(bot.http, "api")
+            self._wrap(async_context.get(), "respond")
+            timing = Timing()
+            token = current.set(timing)
+            try:
+                await invoke(ctx)
+            finally:
+                current.reset(token)
+                self.observe(ctx.command.qualified_name, timing)
+
+        async def checked(ctx: ApplicationContext):
+            if (timing := current.get()) is not None:
+                timing.checked = time.perf_counter()
+
+        bot.invoke_application_command = timed_invoke  # type: ignore
+        bot.before_invoke(checked)
+
+        @bot.listen()
+        async def on_application_command_error(ctx: ApplicationContext, exception):
+            self.errors[ctx.command.qualified_name] += 1
+
+        # pycord retries 429s on its own and only leaves a warning behind
+        def count_rate_limits(record: logging.LogRecord) -> bool:
+            if record.msg.startswith("We are being rate limited"):
+                self.rate_limits += 1
+            return True
+
+        logging.getLogger("discord.http").addFilter(count_rate_limits)
+
+    def _wrap(self, client: Any, phase: str):
+        request: Callable = client.request
+        if getattr(request, "timed", False):
+            return
+
+        async def timed_request(route, *args, **kwargs):
+            if (timing := current.get()) is None:
+                return await request(route, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await request(route, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                setattr(timing, phase, getattr(timing, phase) + elapsed)
+                self.api_calls[f"{route.method} {route.path}"] += 1
+
+        timed_request.timed = True  # type: ignore
+        client.request = timed_request
+
+    def set_write_queue_depth(self, depth: int):
+        self.write_queue_depth = depth
+
+    def observe(self, command: str, timing: Timing):
+        end = time.perf_counter()
+        total = end - timing.start
+        checks = (timing.checked or end) - timing.start
+        self.latency[command].observe(total)
+        for phase, value in zip(
+            PHASES,
+            (
+                checks,
+                timing.api,
+                timing.respond,
+                max(total - checks - timing.api - timing.respond, 0),
+            ),
+        ):
+            self.phases[command, phase].observe(value)
+
+    async def _measure_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.last_lag = max(time.perf_counter() - start - LAG_INTERVAL, 0)
+            self.lag.observe(self.last_lag)
+
+    async def start(self, port: int | None, host: str):
+        """Measure event loop lag and serve the metrics on the port, if there is one"""
+        if self._tasks:
+            return
+        task = asyncio.create_task(self._measure_lag())
+        self._tasks.add(task)
+        if port is not None:
+            self._server = await asyncio.start_server(self._serve, host, port)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b""
+            if path == b"/metrics":
+                status, body = "200 OK", self.exposition().encode()
+            else:
+                status, body = "404 Not Found", b"Try /metrics\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    def exposition(self) -> str:
+        """The metrics in the prometheus text format"""
+        lines: list[str] = []
+
+        def histogram(name: str, help: str, series: dict[str, Histogram]):
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} histogram"])
+            for labels, h in series.items():
+                sep = "," if labels else ""
+                seen = 0
+                for bound, count in zip([*h.buckets, "+Inf"], h.counts):
+                    seen += count
+                    lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {seen}')
+                braces = f"{{{labels}}}" if labels else ""
+                lines.append(f"{name}_sum{braces} {h.sum}")
+                lines.append(f"{name}_count{braces} {h.count}")
+
+        def counter(name: str, help: str, series: dict[str, int]):
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} counter"])
+            for labels, value in series.items():
+                lines.append(
+                    f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+                )
+
+        histogram(
+            "static_bot_command_seconds",
+            "Time to handle a command",
+            {f'command="{c}"': h for c, h in self.latency.items()},
+        )
+        histogram(
+            "static_bot_command_phase_seconds",
+            "Time spent in each phase of a command",
+            {f'command="{c}",phase="{p}"': h for (c, p), h in self.phases.items()},
+        )
+        counter(
+            "static_bot_command_errors_total",
+            "Commands that failed, including failed checks",
+            {f'command="{c}"': n for c, n in self.errors.items()},
+        )
+        counter(
+            "static_bot_api_calls_total",
+            "Discord api calls made by commands",
+            {f'route="{r}"': n for r, n in self.api_calls.items()},
+        )
+        counter(
+            "static_bot_rate_limits_total",
+            "Requests that discord answered with 429",
+            {"": self.rate_limits},
+        )
+        if self.reads is not None:
+            counter(
+                "static_bot_reads_total",
+                "Reads from discord by route, answered from the cache, shared with a read in flight or sent",
+                {
+                    f'route="{route}",result="{result}"': n
+                    for result, counts in (
+                        ("hit", self.reads.hits),
+                        ("shared", self.reads.shared),
+                        ("miss", self.reads.misses),
+                    )
+                    for route, n in counts.items()
+                },
+            )
+        lines.extend(
+            [
+                "# HELP static_bot_write_queue_depth Writes waiting to be sent to discord",
+                "# TYPE static_bot_write_queue_depth gauge",
+                f"static_bot_write_queue_depth {self.write_queue_depth}",
+            ]
+        )
+        if self.startup_seconds is not None:
+            lines.extend(
+                [
+                    "# HELP static_bot_startup_seconds Time from starting until the bot was ready",
+                    "# TYPE static_bot_startup_seconds gauge",
+                    f"static_bot_startup_seconds {self.startup_seconds}",
+                ]
+            )
+        if (rss := resident_memory()) is not None:
+            lines.extend(
+                [
+                    "# HELP static_bot_resident_memory_bytes Memory used by the bot",
+                    "# TYPE static_bot_resident_memory_bytes gauge",
+                    f"static_bot_resident_memory_bytes {rss}",
+                ]
+            )
+        histogram(
+            "static_bot_event_loop_lag_seconds",
+            "How late the event loop runs scheduled callbacks",
+            {"": self.lag},
+        )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[str]:
+        """Human readable lines for the /stats command"""
+        ms = lambda seconds: f"{seconds * 1000:.0f}ms" if seconds < 60 else "a lot"
+        lines = []
+        for command, h in sorted(self.latency.items(), key=lambda c: -c[1].count):
+            avg = {p: self.phases[command, p].sum / h.count for p in PHASES}
+            lines.append(
+                f"`{command}`: {h.count} calls, {self.errors[command]} errors, "
+                f"avg {ms(h.sum / h.count)}, p95 <= {ms(h.quantile(0.95))} ("
+                + ", ".join(f"{p} {ms(avg[p])}" for p in PHASES)
+                + ")"
+            )
+        lines.append(f"Rate limit hits: {self.rate_limits}")
+        lines.append(f"Writes waiting: {self.write_queue_depth}")
+        if self.reads is not None:
+            saved = sum(self.reads.hits.values()) + sum(self.reads.shared.values())
+            lines.append(
+                f"Reads: {sum(self.reads.misses.values())} sent, {saved} saved "
+                f"({sum(self.reads.hits.values())} cached, {sum(self.reads.shared.values())} shared)"
+            )
+        lines.append(
+            f"Event loop lag: {ms(self.last_lag)} now, p95 <= {ms(self.lag.quantile(0.95))}"
+        )
+        if self.startup_seconds is not None:
+            lines.append(f"Startup: {self.startup_seconds:.1f}s")
+        if (rss := resident_memory()) is not None:
+            lines.append(f"Memory: {rss / 2**20:.0f} MiB")
+        return lines
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import discord
+from discord import ButtonStyle, Interaction
+
+MAX_MESSAGE_LENGTH = 2000
+
+
+def truncate(text: str, limit: int = MAX_MESSAGE_LENGTH) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class Paginator:
+    """Collects lines into pages that fit into a single discord message"""
+
+    def __init__(self, limit: int = MAX_MESSAGE_LENGTH, separator: str = "\n"):
+        self.limit = limit
+        self.separator = separator
+        self._lines: list[str] = []
+        self._length = 0
+
+    def add(self, line: str) -> str | None:
+        """Add a line, returning the previous page if the line doesn't fit on it anymore"""
+        line = truncate(line, self.limit)
+        page = None
+        if self._lines and self._length + len(self.separator) + len(line) > self.limit:
+            page = self.flush()
+        self._length += len(line) + (len(self.separator) if self._lines else 0)
+        self._lines.append(line)
+        return page
+
+    def flush(self) -> str | None:
+        if not self._lines:
+            return None
+        page = self.separator.join(self._lines)
+        self._lines, self._length = [], 0
+        return page
+
+
+def paginate(
+    lines: Iterable[str], limit: int = MAX_MESSAGE_LENGTH, separator: str = "\n"
+) -> Iterator[str]:
+    paginator = Paginator(limit, separator)
+    for line in lines:
+        if (page := paginator.add(line)) is not None:
+            yield page
+    if (page := paginator.flush()) is not None:
+        yield page
+
+
+class PageView(discord.ui.View):
+    """Previous/next buttons over lines, each page is only rendered once it's shown"""
+
+    def __init__(self, lines: Iterable[str], timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self._source = paginate(lines)
+        self._pages: list[str] = []
+        self._current = 0
+        # The decorated methods aren't the buttons, the view made those from them in order
+        self._previous, self._next = [
+            item for item in self.children if isinstance(item, discord.ui.Button)
+        ]
+        self._update_buttons()
+
+    def page(self, number: int) -> str | None:
+        while len(self._pages) <= number:
+            if (page := next(self._source, None)) is None:
+                return None
+            self._pages.append(page)
+        return self._pages[number]
+
+    @property
+    def current(self) -> str:
+        return self.page(self._current) or "Nothing to show"
+
+    @property
+    def single_page(self) -> bool:
+        return self._current == 0 and self.page(1) is None
+
+    def _update_buttons(self):
+        self._previous.disabled = self._current == 0
+        self._next.disabled = self.page(self._current + 1) is None
+
+    async def _show(self, interaction: Interaction, number: int):
+        self._current = number
+        self._update_buttons()
+        await interaction.response.edit_message(content=self.current, view=self)
+
+    @discord.ui.button(label="Previous", style=ButtonStyle.secondary)
+    async def previous_page(self, _button, interaction: Interaction):
+        await self._show(interaction, max(self._current - 1, 0))
+
+    @discord.ui.button(label="Next", style=ButtonStyle.secondary)
+    async def next_page(self, _button, interaction: Interaction):
+        await self._show(interaction, self._current + 1)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from discord import HTTPException, Message, NotFound, TextChannel
+from discord.utils import utcnow
+
+from .fanout import FanOut
+
+# Discord refuses to bulk delete older messages, leave some slack for clock skew
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_LIMIT = 100
+PROGRESS_INTERVAL = 2.0
+
+
+@dataclass
+class Progress:
+    checked: int = 0
+    matched: int = 0
+    deleted: int = 0
+    # Messages that discord refused to delete, e.g. system messages
+    failed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"Deleted {self.deleted} of {self.matched} messages so far, checked {self.checked}"
+            + (f", {self.failed} couldn't be deleted" if self.failed else "")
+        )
+
+
+async def purge(
+    channel: TextChannel,
+    fanout: FanOut,
+    limit: int,
+    check: Callable[[Message], bool] = lambda message: True,
+    after: datetime | None = None,
+    before: datetime | None = None,
+    on_progress: Callable[[Progress], Awaitable] | None = None,
+) -> Progress:
+    """Delete up to `limit` messages between after and before that pass the check
+
+    Unlike channel.purge() this doesn't wait for deletes before reading on. Recent messages are
+    bulk deleted in batches of 100 while the history is still being read, older ones are deleted
+    one by one in a separate throttled lane.
+    """
+    progress = Progress()
+    old: asyncio.Queue[Message | None] = asyncio.Queue(maxsize=BULK_DELETE_LIMIT)
+
+    async def delete_old():
+        while (message := await old.get()) is not None:
+            try:
+                async with fanout.throttle("delete_message"):
+                    await message.delete()
+            except NotFound:
+                pass
+            except HTTPException:
+                # One message that can't go shouldn't stop the others
+                progress.failed += 1
+            else:
+                progress.deleted += 1
+
+    async def put_old(message: Message | None):
+        # Don't wait for room in the queue forever if the lane that empties it is gone
+        put = asyncio.ensure_future(old.put(message))
+        await asyncio.wait({put, old_lane}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            await old_lane
+            raise RuntimeError("Deleting old messages stopped early")
+
+    async def delete_recent(messages: list[Message]):
+        try:
+            await channel.delete_messages(messages)
+        except NotFound:
+            # Somebody else deleted one of them, go slow for this batch
+            for message in messages:
+                await put_old(message)
+        else:
+            progress.deleted += len(messages)
+
+    async def report():
+        assert on_progress is not None
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                await on_progress(progress)
+            except HTTPException:
+                pass
+
+    old_lane = asyncio.create_task(delete_old())
+    reporter = asyncio.create_task(report()) if on_progress else None
+    bulk: asyncio.Task | None = None
+    batch: list[Message] = []
+
+    async def flush():
+        nonlocal bulk, batch
+        # One bulk delete at a time, they share a rate limit anyway
+        if bulk is not None:
+            await bulk
+        bulk = asyncio.create_task(delete_recent(batch)) if batch else None
+        batch = []
+
+    try:
+        cutoff = utcnow() - BULK_DELETE_MAX_AGE
+        async for message in channel.history(
+            limit=None, before=before, oldest_first=False
+        ):
+            # history() would read on until the start of the channel
+            if after is not None and message.created_at < after:
+                break
+            progress.checked += 1
+            if not check(message):
+                continue
+
+            progress.matched += 1
+            if message.created_at > cutoff:
+                batch.append(message)
+                if len(batch) == BULK_DELETE_LIMIT:
+                    await flush()
+            else:
+                await put_old(message)
+            if progress.matched >= limit:
+                break
+
+        # Send the last, partial batch and then wait for it
+        await flush()
+        await flush()
+        await put_old(None)
+        await old_lane
+    finally:
+        for task in (old_lane, reporter, bulk):
+            if task is not None:
+                task.cancel()
+    return progress
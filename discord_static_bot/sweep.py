@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import traceback
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from discord import (
+    Bot,
+    CategoryChannel,
+    HTTPException,
+    Member,
+    Message,
+    NotFound,
+    TextChannel,
+)
+from discord.utils import format_dt, snowflake_time, utcnow
+
+from .fanout import TokenBucket
+from .pages import truncate
+from .writes import BACKGROUND, ChannelArchive, ChannelDelete, Write, WriteScheduler
+
+WARNING = "This static has been quiet for a while."
+SWEEP_INTERVAL = 60 * 60
+# Statics per second that a sweep sends requests for, so that it leaves the rate limits to commands
+SWEEP_RATE = 0.5
+
+
+def is_warning(message: Message) -> bool:
+    """Whether the message is a warning from the bot, which isn't activity in the static"""
+    return (
+        message.guild is not None
+        and message.author.id == message.guild.me.id
+        and message.content.startswith(WARNING)
+    )
+
+
+class Sweeper:
+    """Archives or deletes statics that nobody wrote in for a while
+
+    Statics are warned first. The warning is the last message of the static until somebody
+    answers, so a static whose last message is a warning older than the grace period is done
+    for. That needs no state besides the channels themselves and survives restarts.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        writes: WriteScheduler,
+        statics: Callable[[], list[TextChannel]],
+        members: Callable[[TextChannel], Awaitable[list[Member]]],
+        cleanup: Callable[[TextChannel], Awaitable[list[Write]]],
+        inactive: timedelta,
+        grace: timedelta,
+        archive: Callable[[TextChannel], int | None] = lambda channel: None,
+        record: Callable[[TextChannel, str], Awaitable[None]] | None = None,
+    ):
+        self._bot = bot
+        self._writes = writes
+        self._statics = statics
+        self._members = members
+        self._cleanup = cleanup
+        self._inactive = inactive
+        self._grace = grace
+        self._archive = archive
+        self._record = record
+        self._bucket = TokenBucket(SWEEP_RATE, 1)
+        # channel id -> id of the warning, saves fetching the last message to recognize it
+        self._warned: dict[int, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_regularly())
+
+    def warned(self, channel: TextChannel) -> bool:
+        """Whether the last message of the static is a warning that is known to the sweeper"""
+        return (
+            channel.last_message_id is not None
+            and self._warned.get(channel.id) == channel.last_message_id
+        )
+
+    async def _sweep_regularly(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+            await asyncio.sleep(SWEEP_INTERVAL)
+
+    async def sweep(self):
+        now = utcnow()
+        for channel in self._statics():
+            last = (
+                snowflake_time(channel.last_message_id)
+                if channel.last_message_id
+                else channel.created_at
+            )
+            # Recent activity, including recent warnings
+            if last > now - min(self._grace, self._inactive):
+                continue
+            if self._warned.get(channel.id) == channel.last_message_id:
+                warned = True
+            elif last < now - self._inactive:
+                await self._bucket.take()
+                try:
+                    warned = await self._is_warning(channel)
+                except HTTPException as e:
+                    traceback.print_exception(
+                        type(e), e, e.__traceback__, file=sys.stderr
+                    )
+                    continue
+            else:
+                continue
+
+            if not warned:
+                await self._warn(channel, now + self._grace)
+            elif last < now - self._grace:
+                await self._bucket.take()
+                await self._retire(channel)
+
+    async def _is_warning(self, channel: TextChannel) -> bool:
+        if channel.last_message_id is None:
+            return False
+        try:
+            message = await channel.fetch_message(channel.last_message_id)
+        except NotFound:
+            return False
+        return is_warning(message)
+
+    async def _warn(self, channel: TextChannel, until: datetime):
+        what = "archived" if self._archive(channel) else "deleted"
+        await self._bucket.take()
+        try:
+            members = await self._members(channel)
+            warning = await channel.send(
+                truncate(
+                    "\n".join(
+                        [
+                            f"{WARNING} It will be {what} {format_dt(until, 'R')} "
+                            "unless somebody writes here.",
+                            " ".join(m.mention for m in members),
+                        ]
+                    )
+                )
+            )
+        except HTTPException as e:
+            traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+        else:
+            self._warned[channel.id] = warning.id
+
+    async def _retire(self, channel: TextChannel):
+        # Statics are archived if their server has an archive category
+        archive_id = self._archive(channel)
+        archive = channel.guild.get_channel(archive_id) if archive_id else None
+        if archive_id and not isinstance(archive, CategoryChannel):
+            print(
+                f"Not archiving {channel.name}, archive category is gone",
+                file=sys.stderr,
+            )
+            return
+
+        reason = "Nobody wrote in the static for a while"
+        writes: list[Write] = [
+            ChannelArchive(channel, archive, reason=reason)
+            if isinstance(archive, CategoryChannel)
+            else ChannelDelete(channel, reason=reason)
+        ]
+        writes += await self._cleanup(channel)
+        self._warned.pop(channel.id, None)
+        results = await asyncio.gather(
+            *(self._writes.submit(write, BACKGROUND) for write in writes),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                traceback.print_exception(
+                    type(result), result, result.__traceback__, file=sys.stderr
+                )
+        # Only if the channel itself was archived or deleted
+        if self._record is not None and not isinstance(results[0], BaseException):
+            await self._record(
+                channel, "static archive" if archive is not None else "static sweep"
+            )
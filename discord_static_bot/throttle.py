@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+# Buckets refill completely within a minute, forgetting them after that changes nothing
+WINDOW = 60.0
+MAX_BUCKETS = 10_000
+
+
+class Throttle:
+    """Token buckets for any number of keys, like users or channels, in a bounded LRU
+
+    A bucket holds as many tokens as its limit per minute and refills at that rate. Buckets
+    that weren't used for a minute are full again and get dropped, and the least recently used
+    ones go when there are more than `max_buckets`, so memory stays flat.
+    """
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self._max_buckets = max_buckets
+        # key -> (tokens, last update), least recently updated first
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, limits: dict[Hashable, float]) -> float:
+        """Take a token from the bucket of every key, given its limit per minute, at least 1
+
+        Takes nothing if any bucket is empty and returns the seconds until it isn't, 0 otherwise.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        tokens = {}
+        for key, per_minute in limits.items():
+            left, updated = self._buckets.get(key, (per_minute, now))
+            tokens[key] = min(per_minute, left + (now - updated) * per_minute / WINDOW)
+
+        wait = max(
+            (
+                (1 - left) * WINDOW / limits[key]
+                for key, left in tokens.items()
+                if left < 1
+            ),
+            default=0.0,
+        )
+        if wait:
+            return wait
+
+        for key, left in tokens.items():
+            self._buckets[key] = (left - 1, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_buckets:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+    def _expire(self, now: float):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < WINDOW:
+                break
+            del self._buckets[key]
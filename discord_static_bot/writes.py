@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+from heapq import heappop, heappush
+from itertools import count
+from typing import Callable, Hashable, Iterable
+
+from discord import (
+    CategoryChannel,
+    Member,
+    Object,
+    PermissionOverwrite,
+    Permissions,
+    Role,
+    TextChannel,
+)
+from discord.abc import Snowflake
+
+# Lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class Write:
+    """A change to discord that can be merged with later changes to the same thing
+
+    Writes with the same key are coalesced while they wait. Writes with the same route share a
+    discord rate limit bucket and are sent one after the other.
+    """
+
+    key: Hashable
+    route: Hashable
+    priority: int = INTERACTIVE
+
+    def merge(self, later: Write):
+        """Fold a later write with the same key into this one"""
+
+    async def run(self):
+        raise NotImplementedError
+
+
+class OverwriteEdit(Write):
+    """Give members access to a channel or take it away, in a single channel edit"""
+
+    def __init__(
+        self,
+        channel: TextChannel,
+        add: Iterable[Member] = (),
+        remove: Iterable[Member] = (),
+    ):
+        self.channel = channel
+        self.key = ("overwrites", channel.id)
+        self.route = ("channel", channel.id)
+        self.add = {m.id: m for m in add}
+        self.remove = {m.id for m in remove} - set(self.add)
+
+    def merge(self, later: Write):
+        assert isinstance(later, OverwriteEdit)
+        for member_id, member in later.add.items():
+            self.remove.discard(member_id)
+            self.add[member_id] = member
+        for member_id in later.remove:
+            self.add.pop(member_id, None)
+            self.remove.add(member_id)
+
+    async def run(self):
+        channel = self.channel
+        # channel.overwrites leaves out members that aren't cached, editing the channel with
+        # just those would remove them from the static
+        overwrites: dict[Role | Member | Snowflake, PermissionOverwrite] = dict(
+            channel.overwrites.items()
+        )
+        known = {target.id for target in overwrites}
+        for ow in channel._overwrites:
+            if ow.is_member() and ow.id not in known:
+                overwrites[Object(ow.id)] = PermissionOverwrite.from_pair(
+                    Permissions(ow.allow), Permissions(ow.deny)
+                )
+
+        by_id = {target.id: target for target in overwrites}
+        redundant = all(
+            member_id in by_id and overwrites[by_id[member_id]].view_channel
+            for member_id in self.add
+        ) and not any(member_id in by_id for member_id in self.remove)
+        if redundant:
+            return
+
+        for member in self.add.values():
+            target = by_id.get(member.id, member)
+            overwrite = overwrites.get(target, PermissionOverwrite())
+            overwrite.view_channel = True
+            overwrites[target] = overwrite
+        for member_id in self.remove:
+            if member_id in by_id:
+                del overwrites[by_id[member_id]]
+
+        edited = await channel.edit(overwrites=overwrites)
+        # The cache only catches up with the gateway event, the next edit should build on this one
+        if edited is not None:
+            channel._overwrites = edited._overwrites
+
+
+class RoleEdit(Write):
+    """Give a member a role or take it away"""
+
+    def __init__(
+        self, member: Member, role: Role, present: bool, reason: str | None = None
+    ):
+        self.member = member
+        self.role = role
+        self.key = ("role", member.id, role.id)
+        self.route = ("member roles", member.guild.id)
+        self.present = present
+        self.reason = reason
+        # What the member had before any of the coalesced writes
+        self.initial = member.get_role(role.id) is not None
+        self.merged = False
+
+    def merge(self, later: Write):
+        assert isinstance(later, RoleEdit)
+        self.present = later.present
+        self.reason = later.reason
+        self.merged = True
+
+    async def run(self):
+        # An add and a remove that were coalesced cancel out
+        if self.merged and self.present == self.initial:
+            return
+        if self.present:
+            await self.member.add_roles(self.role, reason=self.reason)
+        else:
+            await self.member.remove_roles(self.role, reason=self.reason)
+
+
+class ChannelArchive(Write):
+    """Move a channel to the archive category, leaving it read-only for its members"""
+
+    def __init__(
+        self,
+        channel: TextChannel,
+        archive: CategoryChannel,
+        reason: str | None = None,
+    ):
+        self.channel = channel
+        self.archive = archive
+        self.key = ("archive", channel.id)
+        self.route = ("channel", channel.id)
+        self.reason = reason
+
+    async def run(self):
+        overwrites: dict[Role | Member | Snowflake, PermissionOverwrite] = {}
+        for ow in self.channel._overwrites:
+            target = (
+                self.channel.guild.get_role(ow.id)
+                if ow.is_role()
+                else self.channel.guild.get_member(ow.id)
+            ) or Object(ow.id)
+            overwrite = PermissionOverwrite.from_pair(
+                Permissions(ow.allow), Permissions(ow.deny)
+            )
+            if ow.is_member():
+                overwrite.send_messages = False
+            overwrites[target] = overwrite
+        await self.channel.edit(
+            category=self.archive, overwrites=overwrites, reason=self.reason
+        )
+
+
+class ChannelDelete(Write):
+    def __init__(self, channel: TextChannel, reason: str | None = None):
+        self.channel = channel
+        self.key = ("delete", channel.id)
+        self.route = ("channel", channel.id)
+        self.reason = reason
+
+    async def run(self):
+        await self.channel.delete(reason=self.reason)
+
+
+class RoleDelete(Write):
+    def __init__(self, role: Role, reason: str | None = None):
+        self.role = role
+        self.key = ("delete role", role.id)
+        self.route = ("roles", role.guild.id)
+        self.reason = reason
+
+    async def run(self):
+        await self.role.delete(reason=self.reason)
+
+
+class PrioritySemaphore:
+    """A semaphore that lets the waiter with the lowest priority in first"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = count()
+
+    async def acquire(self, priority: int):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Got the slot right before being cancelled, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+
+class WriteScheduler:
+    """Sends all writes of the bot, coalescing the ones that are still waiting
+
+    Each route has its own queue ordered by priority and is worked on by one task at a time, so
+    that a burst for one rate limit bucket doesn't hold up the others. At most `concurrency`
+    writes are sent at once across all routes, interactive ones first.
+    """
+
+    def __init__(self, concurrency: int, on_depth: Callable[[int], None] | None = None):
+        self._slots = PrioritySemaphore(concurrency)
+        self._on_depth = on_depth
+        self._pending: dict[Hashable, tuple[Write, asyncio.Future]] = {}
+        self._queues: dict[Hashable, list[tuple[int, int, Hashable]]] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+        self._seq = count()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, write: Write, priority: int = INTERACTIVE) -> asyncio.Future:
+        """Queue the write, the result is done once it (or the write it was merged into) is"""
+        queue = self._queues.setdefault(write.route, [])
+        if (entry := self._pending.get(write.key)) is not None:
+            queued, future = entry
+            queued.merge(write)
+            if priority < queued.priority:
+                queued.priority = priority
+                heappush(queue, (priority, next(self._seq), write.key))
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        write.priority = priority
+        self._pending[write.key] = (write, future)
+        heappush(queue, (priority, next(self._seq), write.key))
+        self._report()
+        if write.route not in self._workers:
+            self._workers[write.route] = asyncio.create_task(self._work(write.route))
+        return future
+
+    async def _work(self, route: Hashable):
+        queue = self._queues[route]
+        try:
+            while queue:
+                priority, _, key = heappop(queue)
+                entry = self._pending.get(key)
+                # Left behind when a write got a better priority
+                if entry is None or entry[0].priority != priority:
+                    continue
+                write, future = self._pending.pop(key)
+                self._report()
+
+                await self._slots.acquire(priority)
+                try:
+                    await write.run()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(None)
+                finally:
+                    self._slots.release()
+        finally:
+            del self._workers[route]
+            if not queue:
+                del self._queues[route]
+
+    def _report(self):
+        if self._on_depth is not None:
+            self._on_depth(self.depth)